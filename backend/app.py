@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+from contextlib import asynccontextmanager
 import uvicorn
 from datetime import datetime
 from dotenv import load_dotenv
@@ -13,11 +14,20 @@ load_dotenv()
 from backend.routes import upload, status, download
 from backend.config import job_status, UPLOAD_DIR, OUTPUT_DIR, LOGS_DIR
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the pipeline's worker processes, open log files and HTTP connections on shutdown"""
+    yield
+    await upload.pipeline_service.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Facility Report Generator API",
     description="API for processing PDF files and generating facility reports",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - allow all origins for now (can restrict later)
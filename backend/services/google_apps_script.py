@@ -3,12 +3,20 @@ import logging
 import json
 from typing import Optional
 import httpx
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from backend.services.google_auth import load_credentials, shared_service
+
 logger = logging.getLogger(__name__)
 
+SCOPES = (
+    'https://www.googleapis.com/auth/script.scriptapp',
+    'https://www.googleapis.com/auth/drive',
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/presentations',
+)
+
 
 class GoogleAppsScriptService:
     """Service for executing Google Apps Script functions"""
@@ -18,66 +26,46 @@ class GoogleAppsScriptService:
         self.script_id = os.getenv("GOOGLE_APPS_SCRIPT_ID", "")
         self.web_app_url = os.getenv("GOOGLE_APPS_SCRIPT_WEB_APP_URL", "")
         self.test_fac_web_app_url = os.getenv("GOOGLE_APPS_SCRIPT_TEST_FAC_WEB_APP_URL", "")
+        self._http_client = None
         self._initialize_service()
     
     def _initialize_service(self):
-        """Initialize Google Apps Script API service"""
+        """Initialize Google Apps Script API service, reusing the shared client if one was already built"""
+        self.service = shared_service('script', self._build_service)
+    
+    def _build_service(self):
+        """Build the Google Apps Script API client from the cached credentials; None if unavailable"""
+        credentials = load_credentials(SCOPES)
+        if not credentials:
+            logger.warning("Google credentials unavailable. Apps Script features will be disabled.")
+            return None
         try:
-            SCOPES = [
-                'https://www.googleapis.com/auth/script.scriptapp',
-                'https://www.googleapis.com/auth/drive',
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/presentations'
-            ]
-            
-            # Try to get credentials from environment variable first (for cloud deployments)
-            credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-            credentials = None
-            
-            if credentials_json:
-                try:
-                    # Parse JSON string from environment variable
-                    credentials_dict = json.loads(credentials_json)
-                    credentials = service_account.Credentials.from_service_account_info(
-                        credentials_dict,
-                        scopes=SCOPES
-                    )
-                    logger.info("Google Apps Script service initialized from GOOGLE_CREDENTIALS_JSON")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse GOOGLE_CREDENTIALS_JSON: {e}")
-                    credentials = None
-                except Exception as e:
-                    logger.error(f"Error creating credentials from GOOGLE_CREDENTIALS_JSON: {e}")
-                    credentials = None
-            
-            # Fall back to file path if JSON not available or failed
-            if not credentials:
-                credentials_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
-                
-                if not os.path.exists(credentials_path):
-                    logger.warning(f"Google credentials not found at {credentials_path}. Apps Script features will be disabled.")
-                    return
-                
-                try:
-                    credentials = service_account.Credentials.from_service_account_file(
-                        credentials_path,
-                        scopes=SCOPES
-                    )
-                    logger.info(f"Google Apps Script service initialized from file: {credentials_path}")
-                except Exception as e:
-                    logger.error(f"Error loading credentials from file {credentials_path}: {e}")
-                    return
-            
-            if credentials:
-                self.service = build('script', 'v1', credentials=credentials)
-                logger.info("Google Apps Script service initialized successfully")
-            else:
-                logger.error("Failed to load credentials - both JSON and file methods failed")
-                raise ValueError("Failed to load credentials")
-        
+            service = build('script', 'v1', credentials=credentials)
+            logger.info("Google Apps Script service initialized successfully")
+            return service
         except Exception as e:
             logger.error(f"Failed to initialize Google Apps Script service: {e}")
-            self.service = None
+            return None
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Return a shared keep-alive client for Web App calls so repeated POSTs
+        to script.google.com reuse one pooled connection instead of paying a
+        new TLS handshake per call.
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=300.0,
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=8)
+            )
+        return self._http_client
+    
+    async def aclose(self):
+        """Close the pooled Web App client (a new one is created on the next call)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     async def execute_function(self, function_name: str, parameters: Optional[list] = None) -> dict:
         """
@@ -256,38 +244,38 @@ class GoogleAppsScriptService:
                 post_body.update(extra_data)
                 logger.info(f"POST body includes extra data: {list(extra_data.keys())}")
 
-            # Call the web app URL
-            async with httpx.AsyncClient(timeout=300.0, follow_redirects=True) as client:
-                response = await client.post(
-                    url,
-                    json=post_body,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                logger.info(f"Web App response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        logger.info(f"Apps Script function {function_name} executed successfully via Web App")
-                        logger.info(f"Apps Script response: {json.dumps(result, indent=2)}")
-                        return {
-                            "success": True,
-                            "result": result
-                        }
-                    except Exception as json_error:
-                        # Sometimes Web Apps return text instead of JSON
-                        logger.warning(f"Response is not JSON, treating as success: {json_error}")
-                        return {
-                            "success": True,
-                            "result": {"message": response.text[:200]}
-                        }
-                else:
-                    # Log first 500 chars of error response
-                    error_text = response.text[:500] if response.text else "No response body"
-                    error_msg = f"Web App returned status {response.status_code}: {error_text}"
-                    logger.error(error_msg)
-                    return {"success": False, "error": error_msg}
+            # Call the web app URL (pooled client, connection kept alive between calls)
+            client = self._get_http_client()
+            response = await client.post(
+                url,
+                json=post_body,
+                headers={"Content-Type": "application/json"}
+            )
+            
+            logger.info(f"Web App response status: {response.status_code}")
+            
+            if response.status_code == 200:
+                try:
+                    result = response.json()
+                    logger.info(f"Apps Script function {function_name} executed successfully via Web App")
+                    logger.info(f"Apps Script response: {json.dumps(result, indent=2)}")
+                    return {
+                        "success": True,
+                        "result": result
+                    }
+                except Exception as json_error:
+                    # Sometimes Web Apps return text instead of JSON
+                    logger.warning(f"Response is not JSON, treating as success: {json_error}")
+                    return {
+                        "success": True,
+                        "result": {"message": response.text[:200]}
+                    }
+            else:
+                # Log first 500 chars of error response
+                error_text = response.text[:500] if response.text else "No response body"
+                error_msg = f"Web App returned status {response.status_code}: {error_text}"
+                logger.error(error_msg)
+                return {"success": False, "error": error_msg}
         
         except Exception as e:
             error_msg = f"Error calling Web App: {e}"
@@ -0,0 +1,111 @@
+"""
+Google Auth - Service-account credentials, shared API clients and per-thread transports
+used by the Google Sheets, Slides and Apps Script services
+"""
+
+import os
+import json
+import logging
+import threading
+import functools
+from google.oauth2 import service_account
+from googleapiclient.http import build_http
+import google_auth_httplib2
+
+try:
+    # Optional faster parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    import orjson as _json_parser
+except ImportError:
+    _json_parser = json
+
+logger = logging.getLogger(__name__)
+
+# Process-wide API clients shared by every service instance (built once per API, on first use)
+_SERVICES = {}
+_SERVICES_LOCK = threading.Lock()
+
+# A shared client's httplib2.Http is not thread-safe, so requests executed on
+# worker threads use a transport of their own (one per thread and credentials, reused across calls)
+_THREAD_HTTP = threading.local()
+
+
+def load_credentials(scopes):
+    """
+    Resolve service-account credentials for scopes once per process.
+    Tries GOOGLE_CREDENTIALS_JSON first, then the GOOGLE_CREDENTIALS_PATH file.
+    Returns None (after logging why) when neither is usable.
+    """
+    return _load_credentials(tuple(scopes))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_credentials(scopes: tuple):
+    """Cached body of load_credentials, keyed by the scopes tuple"""
+    # Try to get credentials from environment variable first (for cloud deployments)
+    credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+    credentials = None
+
+    if credentials_json:
+        try:
+            # Parse JSON string from environment variable
+            credentials_dict = _json_parser.loads(credentials_json)
+            credentials = service_account.Credentials.from_service_account_info(
+                credentials_dict,
+                scopes=list(scopes)
+            )
+            logger.info(f"Google credentials loaded from GOOGLE_CREDENTIALS_JSON for scopes {list(scopes)}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse GOOGLE_CREDENTIALS_JSON: {e}")
+            logger.error(f"JSON content (first 100 chars): {credentials_json[:100] if credentials_json else 'None'}")
+            credentials = None
+        except Exception as e:
+            logger.error(f"Error creating credentials from GOOGLE_CREDENTIALS_JSON: {e}")
+            credentials = None
+
+    # Fall back to file path if JSON not available or failed
+    if not credentials:
+        credentials_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
+
+        if not os.path.exists(credentials_path):
+            logger.warning(f"Google credentials not found at {credentials_path}")
+            logger.warning(f"GOOGLE_CREDENTIALS_JSON was: {'SET' if credentials_json else 'NOT SET'}")
+            return None
+
+        try:
+            credentials = service_account.Credentials.from_service_account_file(
+                credentials_path,
+                scopes=list(scopes)
+            )
+            logger.info(f"Google credentials loaded from file: {credentials_path} for scopes {list(scopes)}")
+        except Exception as e:
+            logger.error(f"Error loading credentials from file {credentials_path}: {e}")
+            return None
+
+    return credentials
+
+
+def shared_service(name: str, build_service):
+    """
+    Return the process-wide API client for name, calling build_service() to create it
+    on first use. A None result is not kept, so a later service instance tries again.
+    """
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(name)
+        if service is None:
+            service = build_service()
+            if service is not None:
+                _SERVICES[name] = service
+        return service
+
+
+def thread_http(credentials):
+    """Authorized HTTP transport for the calling thread, for request.execute(http=...)"""
+    transports = getattr(_THREAD_HTTP, "transports", None)
+    if transports is None:
+        transports = _THREAD_HTTP.transports = {}
+    # Credentials are cached for the life of the process, so their id is a stable key
+    http = transports.get(id(credentials))
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=build_http())
+        transports[id(credentials)] = http
+    return http
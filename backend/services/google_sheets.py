@@ -6,15 +6,54 @@ import pandas as pd
 from pathlib import Path
 from typing import Optional
 import os
+import json
 import logging
 import datetime
+import operator
+import asyncio
+import functools
 import numpy as np
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from backend.services.google_auth import load_credentials, shared_service, thread_http
+
 logger = logging.getLogger(__name__)
 
+SCOPES = ('https://www.googleapis.com/auth/spreadsheets',)
+
+
+def _compute_column_letter(col_idx: int) -> str:
+    """Convert 0-based column index to Excel column letter (A, B, ..., Z, AA, AB, ...)"""
+    result = ""
+    col_idx += 1  # Convert to 1-based
+    while col_idx > 0:
+        col_idx -= 1
+        result = chr(65 + (col_idx % 26)) + result
+        col_idx //= 26
+    return result
+
+
+# Precomputed letters for columns A..ZZ (702 entries)
+_COLUMN_LETTERS = tuple(_compute_column_letter(i) for i in range(702))
+
+# "count:total" ratio columns - kept as text so Sheets does not turn them into times
+_RATIO_COLUMNS = ('HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio')
+_RATIO_DTYPES = {col: str for col in _RATIO_COLUMNS}
+# Including the NP_ (Non-Puzzle) variants written in comparison mode
+_ALL_RATIO_COLUMNS = _RATIO_COLUMNS + tuple(f"NP_{col}" for col in _RATIO_COLUMNS)
+
+# Values a formula cell shows while it is still calculating or when its inputs are not there yet
+_SHEET_ERROR_VALUES = frozenset({'#N/A', '#REF!', '#VALUE!', '#DIV/0!', '#NAME?', '#NUM!', '#NULL!', '#ERROR!'})
+
+
+def _formula_cell_pending(cell) -> bool:
+    """True if a formula cell read back from the API has not produced a usable value yet"""
+    if not isinstance(cell, str):
+        return False
+    cell = cell.strip()
+    return cell.startswith('Loading') or cell in _SHEET_ERROR_VALUES
+
 
 class GoogleSheetsService:
     """Service for interacting with Google Sheets"""
@@ -22,10 +61,15 @@ class GoogleSheetsService:
     def __init__(self):
         self.service = None
         self.sheets_service = None
+        self.credentials = load_credentials(SCOPES)
         self._initialize_service()
         self.sheet_id = os.getenv("GOOGLE_SHEET_ID", "1CWV6su2PZUrP372Vd19N6sZzXcEFxZb_NNZwT0af0Wo")
         self.sheet_tab = os.getenv("GOOGLE_SHEET_TAB", "Summary")
         self.medilodge_q3_sheet_id = os.getenv("MEDILODGE_Q3_DATA_SHEET_ID", "1BlTxrYp5368Ggl5fRDI99O27AECH5auLM-mxJhr_tzw")
+        self.test_sheet_id = "1FvZLxUS36JON-O8yY6zvrxxYyfOMHtHzmKAWUd5ytZk"
+        # Formula-driven values on the Test sheet's Summary tab (A=key, B=value; B2 is the quarter),
+        # computed from Raw_Data - polled after a Raw_Data paste to know the sheet has recalculated
+        self.test_sheet_recalc_range = "Summary!B3:B40"
 
     @staticmethod
     def _to_number(value):
@@ -113,6 +157,26 @@ class GoogleSheetsService:
                             row[c_idx] = GoogleSheetsService._to_number(row[c_idx])
         return values
 
+    @staticmethod
+    def _complete_gg_rows(l_y_block: pd.DataFrame, aa_an_block: pd.DataFrame):
+        """
+        Vectorized completeness check for the GG columns.
+        Both blocks must be 14 columns wide (L-Y and AA-AN). A row counts only if
+        every cell in both blocks is populated and both column Y and column AN
+        (index 13 of each block) are numeric.
+
+        Returns:
+            (mask, y, an): boolean row mask plus float64 arrays of the Y and AN values
+        """
+        def populated(block):
+            filled = block.notna() & block.astype(str).apply(lambda col: col.str.strip()).ne('')
+            return filled.all(axis=1).to_numpy()
+
+        y = pd.to_numeric(l_y_block.iloc[:, 13], errors='coerce').to_numpy(dtype=np.float64)
+        an = pd.to_numeric(aa_an_block.iloc[:, 13], errors='coerce').to_numpy(dtype=np.float64)
+        mask = populated(l_y_block) & populated(aa_an_block) & np.isfinite(y) & np.isfinite(an)
+        return mask, y, an
+
     def _get_sheet_id(self, spreadsheet_id: str, tab_title: str) -> Optional[int]:
         """Fetch sheetId for a given tab title."""
         try:
@@ -162,66 +226,22 @@ class GoogleSheetsService:
             logger.warning(f"Failed to apply numeric format to {tab_title}: {e}")
     
     def _initialize_service(self):
-        """Initialize Google Sheets API service"""
+        """Initialize Google Sheets API service, reusing the shared client if one was already built"""
+        self.service = shared_service('sheets', self._build_service)
+        self.sheets_service = self.service.spreadsheets() if self.service else None
+    
+    def _build_service(self):
+        """Build the Google Sheets API client from the cached credentials; None if unavailable"""
+        if not self.credentials:
+            logger.warning("Google credentials unavailable. Sheets features will be disabled.")
+            return None
         try:
-            import json
-            
-            SCOPES = [
-                'https://www.googleapis.com/auth/spreadsheets'
-            ]
-            
-            # Try to get credentials from environment variable first (for cloud deployments)
-            credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-            credentials = None
-            
-            if credentials_json:
-                try:
-                    # Parse JSON string from environment variable
-                    credentials_dict = json.loads(credentials_json)
-                    credentials = service_account.Credentials.from_service_account_info(
-                        credentials_dict,
-                        scopes=SCOPES
-                    )
-                    logger.info("Google Sheets service initialized from GOOGLE_CREDENTIALS_JSON")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse GOOGLE_CREDENTIALS_JSON: {e}")
-                    logger.error(f"JSON content (first 100 chars): {credentials_json[:100] if credentials_json else 'None'}")
-                    credentials = None
-                except Exception as e:
-                    logger.error(f"Error creating credentials from GOOGLE_CREDENTIALS_JSON: {e}")
-                    credentials = None
-            
-            # Fall back to file path if JSON not available or failed
-            if not credentials:
-                credentials_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
-                
-                if not os.path.exists(credentials_path):
-                    logger.warning(f"Google credentials not found at {credentials_path}. Sheets features will be disabled.")
-                    logger.warning(f"GOOGLE_CREDENTIALS_JSON was: {'SET' if credentials_json else 'NOT SET'}")
-                    return
-                
-                try:
-                    credentials = service_account.Credentials.from_service_account_file(
-                        credentials_path,
-                        scopes=SCOPES
-                    )
-                    logger.info(f"Google Sheets service initialized from file: {credentials_path}")
-                except Exception as e:
-                    logger.error(f"Error loading credentials from file {credentials_path}: {e}")
-                    return
-            
-            if credentials:
-                self.service = build('sheets', 'v4', credentials=credentials)
-                self.sheets_service = self.service.spreadsheets()
-                logger.info("Google Sheets service initialized successfully")
-            else:
-                logger.error("Failed to load credentials - both JSON and file methods failed")
-                raise ValueError("Failed to load credentials")
-        
+            service = build('sheets', 'v4', credentials=self.credentials)
+            logger.info("Google Sheets service initialized successfully")
+            return service
         except Exception as e:
             logger.error(f"Failed to initialize Google Sheets service: {e}")
-            self.service = None
-            self.sheets_service = None
+            return None
     
     async def clear_all_sheets(self) -> bool:
         """
@@ -292,9 +312,7 @@ class GoogleSheetsService:
             
             # Read CSV file
             # Keep ratio columns as strings to prevent automatic time conversion
-            ratio_columns = ['HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio']
-            dtype_dict = {col: str for col in ratio_columns}
-            df = pd.read_csv(csv_file, dtype=dtype_dict)
+            df = pd.read_csv(csv_file, dtype=_RATIO_DTYPES)
             
             # Log what we're reading
             logger.info(f"Reading CSV file: {csv_file}")
@@ -316,10 +334,8 @@ class GoogleSheetsService:
             # Normalize values to numeric where possible to avoid time/text formatting
             # Use apply with map instead of deprecated applymap, and handle NaN values
             # Skip ratio columns to preserve "count:total" format (including NP_ variants for comparison mode)
-            ratio_columns = ['HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio',
-                           'NP_HD', 'NP_HDN', 'NP_HT', 'NP_Ex', 'NP_Cus', 'NP_AL', 'NP_OT', 'NP_SNF', 'NP_Managed Care Ratio', 'NP_Medicare A Ratio']
             for col in df.columns:
-                if col not in ratio_columns:
+                if col not in _ALL_RATIO_COLUMNS:
                     df[col] = df[col].apply(lambda x: self._to_number(x) if pd.notna(x) else x)
             
             # Extract quarter value (for Executive sheet only, not Summary sheet)
@@ -436,37 +452,27 @@ class GoogleSheetsService:
 
             # Normalize numeric columns to ensure numbers, not strings/times
             # Skip ratio columns to preserve "count:total" format (including NP_ variants)
-            ratio_columns = ['HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio',
-                           'NP_HD', 'NP_HDN', 'NP_HT', 'NP_Ex', 'NP_Cus', 'NP_AL', 'NP_OT', 'NP_SNF', 'NP_Managed Care Ratio', 'NP_Medicare A Ratio']
-            values = self._normalize_numeric_columns(values, start_col=1, end_col=130, skip_columns=ratio_columns)
+            values = self._normalize_numeric_columns(values, start_col=1, end_col=130, skip_columns=_ALL_RATIO_COLUMNS)
 
             # Prepend single quote to ratio columns to force Google Sheets to treat as text
             header = values[0]
-            ratio_col_indices = [i for i, col in enumerate(header) if col in ratio_columns]
+            ratio_col_indices = [i for i, col in enumerate(header) if col in _ALL_RATIO_COLUMNS]
             for row_idx in range(1, len(values)):  # Skip header row
                 for col_idx in ratio_col_indices:
                     if col_idx < len(values[row_idx]) and values[row_idx][col_idx]:
                         # Add single quote prefix to force text format in Google Sheets
                         values[row_idx][col_idx] = f"'{values[row_idx][col_idx]}"
             
-            # Clear existing data
+            # Clear existing data in one batchClear:
             # 1) Hard-clear GS/PPS/INC columns to avoid stale data even if new payload is smaller
-            try:
-                self.sheets_service.values().batchClear(
-                    spreadsheetId=self.sheet_id,
-                    body={"ranges": [f"{self.sheet_tab}!AE:DZ"]}
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not clear AA:AC columns: {e}")
-            
             # 2) Clear main data range to remove extra rows
             try:
-                range_name = f"{self.sheet_tab}!A1:DZ10000"
-                self.sheets_service.values().clear(
+                range_names = [f"{self.sheet_tab}!AE:DZ", f"{self.sheet_tab}!A1:DZ10000"]
+                self.sheets_service.values().batchClear(
                     spreadsheetId=self.sheet_id,
-                    range=range_name
+                    body={"ranges": range_names}
                 ).execute()
-                logger.info(f"Cleared existing data from {range_name}")
+                logger.info(f"Cleared existing data from {range_names}")
             except Exception as e:
                 logger.warning(f"Could not clear existing data: {e}")
             
@@ -556,13 +562,14 @@ class GoogleSheetsService:
         try:
             executive_tab = "Executive"
             
-            # First, check if Executive sheet exists, if not create it
+            # Get existing data from Executive sheet to preserve structure;
+            # the same read tells us whether the sheet exists, if not create it
             try:
-                # Try to read from Executive sheet to check if it exists
-                self.sheets_service.values().get(
+                existing_data = self.sheets_service.values().get(
                     spreadsheetId=self.sheet_id,
-                    range=f"{executive_tab}!A1"
+                    range=f"{executive_tab}!A:Z"
                 ).execute()
+                existing_values = existing_data.get('values', [])
             except HttpError as e:
                 if e.resp.status == 400:
                     # Sheet doesn't exist, create it
@@ -579,19 +586,10 @@ class GoogleSheetsService:
                         body={'requests': requests}
                     ).execute()
                     logger.info(f"Created Executive sheet")
+                    existing_values = []
                 else:
                     raise
             
-            # Get existing data from Executive sheet to preserve structure
-            try:
-                existing_data = self.sheets_service.values().get(
-                    spreadsheetId=self.sheet_id,
-                    range=f"{executive_tab}!A:Z"
-                ).execute()
-                existing_values = existing_data.get('values', [])
-            except:
-                existing_values = []
-            
             # Update or add Quarter in first column (column A)
             if existing_values:
                 # Update first column header to "Quarter" if needed
@@ -695,14 +693,12 @@ class GoogleSheetsService:
 
             # Normalize numeric columns before writing to Test sheet
             # Skip ratio columns to preserve "count:total" format (including NP_ variants)
-            ratio_columns = ['HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio',
-                           'NP_HD', 'NP_HDN', 'NP_HT', 'NP_Ex', 'NP_Cus', 'NP_AL', 'NP_OT', 'NP_SNF', 'NP_Managed Care Ratio', 'NP_Medicare A Ratio']
-            source_values = self._normalize_numeric_columns(source_values, start_col=1, end_col=130, skip_columns=ratio_columns)
+            source_values = self._normalize_numeric_columns(source_values, start_col=1, end_col=130, skip_columns=_ALL_RATIO_COLUMNS)
 
             # Prepend single quote to ratio columns to force Google Sheets to treat as text
             if len(source_values) > 0:
                 header = source_values[0]
-                ratio_col_indices = [i for i, col in enumerate(header) if col in ratio_columns]
+                ratio_col_indices = [i for i, col in enumerate(header) if col in _ALL_RATIO_COLUMNS]
                 for row_idx in range(1, len(source_values)):  # Skip header row
                     for col_idx in ratio_col_indices:
                         if col_idx < len(source_values[row_idx]) and source_values[row_idx][col_idx]:
@@ -917,36 +913,31 @@ class GoogleSheetsService:
             # Prepare data rows: collect all facility data from Raw_Data
             data_rows = []
             numeric_values = {dest_col: [] for _, dest_col in column_mapping}
+
+            # Resolve header indices once; missing (NP_) columns read from a
+            # trailing blank cell appended to each (already padded) row
+            blank_idx = len(raw_headers)
+            dest_cols = [dest_col for _, dest_col in column_mapping]
+            getter = operator.itemgetter(
+                facility_col_idx,
+                *[source_col_indices.get(source_col, blank_idx) for source_col, _ in column_mapping]
+            )
             
             for row in raw_data_rows:
-                if len(row) <= facility_col_idx:
-                    continue
-                
-                facility_name = row[facility_col_idx] if len(row) > facility_col_idx else ""
+                facility_name, *values = getter(row[:blank_idx] + [""])
                 if not facility_name or str(facility_name).strip() == "":
                     continue
                 
-                # Shorten facility name for chart display (remove "Medilodge of" prefix)
-                short_name = self._shorten_facility_name_for_chart(facility_name)
-                
-                # Build row data: [Facility, LOS Man Avg, LOS Med Avg, INC, GS, PPS]
-                row_data = [short_name]
+                # Convert to number if possible for averaging
+                for dest_col, value in zip(dest_cols, values):
+                    try:
+                        if value and str(value).strip() != "":
+                            numeric_values[dest_col].append(float(value))
+                    except (ValueError, TypeError):
+                        pass
                 
-                for source_col, dest_col in column_mapping:
-                    source_idx = source_col_indices.get(source_col)
-                    value = ""
-                    if source_idx is not None and len(row) > source_idx:
-                        value = row[source_idx]
-                        # Convert to number if possible for averaging
-                        try:
-                            if value and str(value).strip() != "":
-                                num_value = float(value)
-                                numeric_values[dest_col].append(num_value)
-                        except (ValueError, TypeError):
-                            pass
-                    row_data.append(value)
-                
-                data_rows.append(row_data)
+                # Build row data: [Facility (shortened for chart display), mapped columns...]
+                data_rows.append([self._shorten_facility_name_for_chart(facility_name), *values])
             
             if not data_rows:
                 logger.warning("No facility data to copy from Raw_Data")
@@ -1040,9 +1031,7 @@ class GoogleSheetsService:
             logger.error(f"HTTP error copying Raw_Data to Facility_Data: {e}")
             return False
         except Exception as e:
-            logger.error(f"Error copying Raw_Data to Facility_Data: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"Error copying Raw_Data to Facility_Data: {e}")
             return False
     
     def _get_sheet_id(self, spreadsheet_id: str, sheet_name: str) -> int:
@@ -1055,13 +1044,9 @@ class GoogleSheetsService:
 
     def _column_index_to_letter(self, col_idx: int) -> str:
         """Convert 0-based column index to Excel column letter (A, B, ..., Z, AA, AB, ...)"""
-        result = ""
-        col_idx += 1  # Convert to 1-based
-        while col_idx > 0:
-            col_idx -= 1
-            result = chr(65 + (col_idx % 26)) + result
-            col_idx //= 26
-        return result
+        if 0 <= col_idx < len(_COLUMN_LETTERS):
+            return _COLUMN_LETTERS[col_idx]
+        return _compute_column_letter(col_idx)
     
     def _shorten_facility_name_for_chart(self, facility_name: str) -> str:
         """
@@ -1108,6 +1093,41 @@ class GoogleSheetsService:
 
         return name
     
+    async def wait_for_recalc(self, spreadsheet_id: str, cell_range: str, timeout: float = 10.0) -> bool:
+        """
+        Poll a range of formula cells until it has data and no cell is still "Loading..."
+        or an error value such as #N/A, instead of sleeping a fixed time.
+        Backs off from 0.25s up to 2s between reads.
+        
+        Returns:
+            bool: True once the range is ready, False on timeout or read errors
+        """
+        if not self.sheets_service:
+            return False
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.25
+        while True:
+            try:
+                response = await loop.run_in_executor(None, lambda: self.sheets_service.values().get(
+                    spreadsheetId=spreadsheet_id,
+                    range=cell_range,
+                    valueRenderOption='UNFORMATTED_VALUE'
+                ).execute(http=thread_http(self.credentials)))
+                cells = [cell for row in response.get('values', []) for cell in row]
+                if cells and not any(_formula_cell_pending(cell) for cell in cells):
+                    return True
+            except Exception as e:
+                logger.warning(f"Could not read {cell_range} while waiting for recalculation: {e}")
+                return False
+            
+            if loop.time() + delay > deadline:
+                logger.warning(f"Timed out after {timeout}s waiting for {cell_range} to calculate")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 2.0)
+    
     async def append_data(self, data: list, sheet_name: Optional[str] = None) -> bool:
         """
         Append data to Google Sheets
@@ -1271,9 +1291,12 @@ class GoogleSheetsService:
         # Use provided sheet_id or fall back to default
         target_sheet_id = sheet_id if sheet_id else self.medilodge_q3_sheet_id
         
-        # Verify sheet is accessible
+        # Verify sheet is accessible - only the titles are needed, not the full grid metadata
         try:
-            sheet_metadata = self.sheets_service.get(spreadsheetId=target_sheet_id).execute()
+            sheet_metadata = self.sheets_service.get(
+                spreadsheetId=target_sheet_id,
+                fields='properties.title,sheets.properties.title'
+            ).execute(http=thread_http(self.credentials))
             sheet_title = sheet_metadata.get('properties', {}).get('title', 'Unknown')
             logger.info(f"Accessing Google Sheet: '{sheet_title}' (ID: {target_sheet_id})")
             
@@ -1286,6 +1309,13 @@ class GoogleSheetsService:
         
         results = {}
         
+        # Exact tab names keyed by lowercase title for case-insensitive lookup
+        tabs_by_lower = {}
+        for available_tab in tabs:
+            tabs_by_lower.setdefault(available_tab.lower(), available_tab)
+        
+        # Resolve every facility to its tab first so all tabs can be read in one request
+        facility_tabs = []
         for facility_name in facility_names:
             # Explicit check for Grand Blanc
             if 'blanc' in facility_name.lower():
@@ -1298,130 +1328,105 @@ class GoogleSheetsService:
                 continue
             
             # Find the exact tab name (case-insensitive) from available tabs
-            tab_name = None
-            for available_tab in tabs:
-                if available_tab.lower() == tab_name_mapped.lower():
-                    tab_name = available_tab  # Use the exact case from the sheet
-                    logger.info(f"Mapped facility '{facility_name}' to tab '{tab_name}'")
-                    break
-            
-            if not tab_name:
+            tab_name = tabs_by_lower.get(tab_name_mapped.lower())  # Use the exact case from the sheet
+            if tab_name:
+                logger.info(f"Mapped facility '{facility_name}' to tab '{tab_name}'")
+            else:
                 logger.warning(f"Tab '{tab_name_mapped}' not found in sheet for facility '{facility_name}'. Available tabs: {tabs}")
                 continue
             
+            facility_tabs.append((facility_name, tab_name))
+        
+        if not facility_tabs:
+            return results
+        
+        # Read columns L-Y and AA-AN separately to ensure proper alignment
+        # Columns L-Y (columns 12-25, 0-indexed: 11-24)
+        # Columns AA-AN (columns 27-40, 0-indexed: 26-39)
+        # Rows 4-250 (1-indexed, so 0-indexed: 3-249)
+        # One batchGet covers both ranges of every tab; UNFORMATTED_VALUE returns numbers as numbers.
+        ranges = []
+        for _, tab_name in facility_tabs:
+            ranges.extend([f"{tab_name}!L4:Y250", f"{tab_name}!AA4:AN250"])
+        
+        try:
+            logger.info(f"Reading data from {len(facility_tabs)} tabs in one batchGet ({len(ranges)} ranges)")
+            response = self.sheets_service.values().batchGet(
+                spreadsheetId=target_sheet_id,
+                ranges=ranges,
+                valueRenderOption='UNFORMATTED_VALUE'
+            ).execute(http=thread_http(self.credentials))
+        except HttpError as e:
+            error_details = str(e)
+            logger.error(f"HTTP Error fetching facility tabs from sheet (ID: {target_sheet_id}): {error_details}")
+            # Check if it's a permission or not found error
+            if '404' in error_details or 'not found' in error_details.lower():
+                logger.error(f"One of the tabs {[tab for _, tab in facility_tabs]} may not exist in the sheet")
+            elif '403' in error_details or 'permission' in error_details.lower():
+                logger.error("Permission denied accessing facility tabs - check sheet permissions")
+            return results
+        
+        value_ranges = response.get('valueRanges', [])
+        computed = []  # (facility_name, gs, pps, inc) - rounded together after the loop
+        
+        for i, (facility_name, tab_name) in enumerate(facility_tabs):
             try:
-                # Read columns L-Y and AA-AN separately to ensure proper alignment
-                # Columns L-Y (columns 12-25, 0-indexed: 11-24) 
-                # Columns AA-AN (columns 27-40, 0-indexed: 26-39)
-                # Rows 4-250 (1-indexed, so 0-indexed: 3-249)
-                range_l_y = f"{tab_name}!L4:Y250"
-                range_aa_an = f"{tab_name}!AA4:AN250"
-                
-                logger.info(f"Reading data from tab '{tab_name}' for facility '{facility_name}'")
-                
-                result_l_y = self.sheets_service.values().get(
-                    spreadsheetId=target_sheet_id,
-                    range=range_l_y
-                ).execute()
+                values_l_y = value_ranges[2 * i].get('values', []) if 2 * i < len(value_ranges) else []
+                values_aa_an = value_ranges[2 * i + 1].get('values', []) if 2 * i + 1 < len(value_ranges) else []
                 
-                result_aa_an = self.sheets_service.values().get(
-                    spreadsheetId=target_sheet_id,
-                    range=range_aa_an
-                ).execute()
-                
-                values_l_y = result_l_y.get('values', [])
-                values_aa_an = result_aa_an.get('values', [])
-                
-                logger.info(f"Read {len(values_l_y)} rows from L-Y and {len(values_aa_an)} rows from AA-AN for '{facility_name}'")
+                logger.info("Read %d rows from L-Y and %d rows from AA-AN for '%s'", len(values_l_y), len(values_aa_an), facility_name)
                 
                 if not values_l_y or not values_aa_an:
-                    logger.warning(f"No data found in tab '{tab_name}' for facility '{facility_name}' (L-Y: {len(values_l_y)} rows, AA-AN: {len(values_aa_an)} rows)")
+                    logger.warning("No data found in tab '%s' for facility '%s' (L-Y: %d rows, AA-AN: %d rows)",
+                                   tab_name, facility_name, len(values_l_y), len(values_aa_an))
                     continue
                 
-                # Column Y is the 14th column in L-Y range (index 13)
-                # Column AN is the 14th column in AA-AN range (index 13)
-                col_y_index = 13  # Y is the 14th column (L=0, M=1, ..., Y=13)
-                col_an_index = 13  # AN is the 14th column (AA=0, AB=1, ..., AN=13)
-                
-                complete_rows_y = []
-                complete_rows_an = []
-                
-                # Find rows where all columns L-Y and AA-AN are populated
+                # Find rows where all columns L-Y and AA-AN are populated.
+                # Ragged API rows are padded to the 14-column width of each range;
+                # column Y / AN is index 13 of its block.
                 max_rows = min(len(values_l_y), len(values_aa_an))
-                
-                for row_idx in range(max_rows):
-                    row_l_y = values_l_y[row_idx] if row_idx < len(values_l_y) else []
-                    row_aa_an = values_aa_an[row_idx] if row_idx < len(values_aa_an) else []
-                    
-                    # Check if all columns L-Y are populated (14 columns: L through Y)
-                    l_y_complete = len(row_l_y) >= 14 and all(
-                        cell and str(cell).strip() != '' 
-                        for cell in row_l_y[:14]
-                    )
-                    
-                    # Check if all columns AA-AN are populated (14 columns: AA through AN)
-                    aa_an_complete = len(row_aa_an) >= 14 and all(
-                        cell and str(cell).strip() != '' 
-                        for cell in row_aa_an[:14]
-                    )
-                    
-                    # Row is complete only if BOTH sections are fully populated
-                    if l_y_complete and aa_an_complete:
-                        # Get column Y value (index 13 in L-Y range)
-                        if len(row_l_y) > col_y_index:
-                            y_value = row_l_y[col_y_index]
-                            try:
-                                y_num = float(y_value)
-                                complete_rows_y.append(y_num)
-                            except (ValueError, TypeError):
-                                pass
-                        
-                        # Get column AN value (index 13 in AA-AN range)
-                        if len(row_aa_an) > col_an_index:
-                            an_value = row_aa_an[col_an_index]
-                            try:
-                                an_num = float(an_value)
-                                complete_rows_an.append(an_num)
-                            except (ValueError, TypeError):
-                                pass
+                l_y_block = pd.DataFrame(values_l_y[:max_rows]).reindex(columns=range(14))
+                aa_an_block = pd.DataFrame(values_aa_an[:max_rows]).reindex(columns=range(14))
+                mask, y, an = self._complete_gg_rows(l_y_block, aa_an_block)
+                n = int(mask.sum())
                 
                 # Calculate averages
-                if complete_rows_y and complete_rows_an and len(complete_rows_y) == len(complete_rows_an):
-                    gs = sum(complete_rows_y) / len(complete_rows_y)
-                    pps = sum(complete_rows_an) / len(complete_rows_an)
+                if n:
+                    gs = float(y[mask].mean())
+                    pps = float(an[mask].mean())
                     inc = pps - gs
+                    computed.append((facility_name, gs, pps, inc))
                     
-                    results[facility_name] = {
-                        "GS": round(gs, 2),
-                        "PPS": round(pps, 2),
-                        "INC": round(inc, 2)
-                    }
-                    
-                    logger.info(f"Calculated metrics for '{facility_name}' (tab: {tab_name}): "
-                              f"GS={gs:.2f}, PPS={pps:.2f}, INC={inc:.2f} "
-                              f"(from {len(complete_rows_y)} complete rows)")
+                    logger.info("Calculated metrics for '%s' (tab: %s): GS=%.2f, PPS=%.2f, INC=%.2f (from %d complete rows)",
+                                facility_name, tab_name, gs, pps, inc, n)
                 else:
-                    logger.warning(f"Insufficient complete rows for '{facility_name}' (tab: {tab_name}): "
-                                 f"Y values: {len(complete_rows_y)}, AN values: {len(complete_rows_an)}")
+                    logger.warning("Insufficient complete rows for '%s' (tab: %s): "
+                                   "no rows with all L-Y and AA-AN populated and numeric Y/AN values", facility_name, tab_name)
                     # Log more details for debugging
-                    logger.info(f"Total rows checked: {max_rows}, L-Y rows: {len(values_l_y)}, AA-AN rows: {len(values_aa_an)}")
+                    logger.info("Total rows checked: %d, L-Y rows: %d, AA-AN rows: %d", max_rows, len(values_l_y), len(values_aa_an))
                     
-            except HttpError as e:
-                error_details = str(e)
-                logger.error(f"HTTP Error fetching data from tab '{tab_name}' for facility '{facility_name}': {error_details}")
-                # Check if it's a permission or not found error
-                if '404' in error_details or 'not found' in error_details.lower():
-                    logger.error(f"Tab '{tab_name}' may not exist in the sheet")
-                elif '403' in error_details or 'permission' in error_details.lower():
-                    logger.error(f"Permission denied accessing tab '{tab_name}' - check sheet permissions")
             except Exception as e:
-                import traceback
-                error_traceback = traceback.format_exc()
-                logger.error(f"Unexpected error processing facility '{facility_name}': {e}")
-                logger.error(f"Traceback: {error_traceback}")
+                logger.exception("Unexpected error processing facility '%s': %s", facility_name, e)
+        
+        if computed:
+            rounded = np.round(np.array([row[1:] for row in computed], dtype=np.float64), 2)
+            for (facility_name, *_), (gs, pps, inc) in zip(computed, rounded.tolist()):
+                results[facility_name] = {"GS": gs, "PPS": pps, "INC": inc}
         
         return results
     
+    async def fetch_facility_metrics_async(self, facility_names: list, sheet_id: Optional[str] = None) -> dict:
+        """
+        Async wrapper for fetch_facility_metrics.
+        Runs the blocking Sheets API reads in a worker thread so the event loop
+        (status polling, other jobs) keeps running while waiting on Google;
+        fetch_facility_metrics executes its requests on that thread's own transport.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.fetch_facility_metrics, facility_names, sheet_id=sheet_id)
+        )
+    
     def _find_los_csv_for_facility(self, facility_name: str, los_csv_dir: str):
         """Find the LOS CSV file for a given facility name."""
         import glob as glob_mod
@@ -1499,7 +1504,8 @@ class GoogleSheetsService:
             return result
 
         try:
-            los_df = pd.read_csv(los_csv_path)
+            # Only name/payer text is used from this file - read as strings and skip dtype inference
+            los_df = pd.read_csv(los_csv_path, dtype=str)
             logger.info(f"Loaded LOS CSV for '{facility_name}': {los_csv_path.name} ({len(los_df)} rows)")
 
             # Find first_name and last_name columns (case-insensitive)
@@ -1550,7 +1556,7 @@ class GoogleSheetsService:
                         payer_gains[payer] = []
                     payer_gains[payer].append(gain)
                 else:
-                    logger.debug(f"No payer match for patient {patient['first_name']} {patient['last_name']}")
+                    logger.debug("No payer match for patient %s %s", patient['first_name'], patient['last_name'])
 
             logger.info(f"Payer matching for '{facility_name}': {matched_count}/{len(complete_row_details)} patients matched. Payers: {list(payer_gains.keys())}")
 
@@ -1570,14 +1576,27 @@ class GoogleSheetsService:
             logger.info(f"Payer GG gains for '{facility_name}': MC={result['GG_Gain_MC']}, MA={result['GG_Gain_MA']}, Overall={result['GG_Gain_Overall']}")
 
         except Exception as e:
-            logger.error(f"Error calculating payer GG gains for '{facility_name}': {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"Error calculating payer GG gains for '{facility_name}': {e}")
             result.setdefault("GG_Gain_MC", 0)
             result.setdefault("GG_Gain_MA", 0)
 
         return result
 
+    async def fetch_facility_metrics_from_file_async(self, facility_names: list, file_path: str, los_csv_dir: str = None,
+                                                     comparison_mode: bool = False, puzzle_patient_names_file: str = None) -> dict:
+        """
+        Async wrapper for fetch_facility_metrics_from_file.
+        Runs the Excel/CSV parsing in a worker thread so it does not block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(
+                self.fetch_facility_metrics_from_file, facility_names, file_path,
+                los_csv_dir=los_csv_dir, comparison_mode=comparison_mode,
+                puzzle_patient_names_file=puzzle_patient_names_file
+            )
+        )
+
     def fetch_facility_metrics_from_file(self, facility_names: list, file_path: str, los_csv_dir: str = None,
                                          comparison_mode: bool = False, puzzle_patient_names_file: str = None) -> dict:
         """
@@ -1630,8 +1649,9 @@ class GoogleSheetsService:
                 logger.info(f"Looking for tab '{tab_name_mapped}' (case-insensitive) in available sheets: {sheet_names}")
                 tab_name = None
                 for available_tab in sheet_names:
-                    logger.debug(f"  Comparing: '{available_tab.lower()}' == '{tab_name_mapped.lower()}' -> {available_tab.lower() == tab_name_mapped.lower()}")
-                    if available_tab.lower() == tab_name_mapped.lower():
+                    matched = available_tab.lower() == tab_name_mapped.lower()
+                    logger.debug("  Comparing: '%s' == '%s' -> %s", available_tab.lower(), tab_name_mapped.lower(), matched)
+                    if matched:
                         tab_name = available_tab  # Use the exact case from the file
                         logger.info(f"Mapped facility '{facility_name}' to sheet '{tab_name}'")
                         break
@@ -1654,81 +1674,34 @@ class GoogleSheetsService:
                         logger.warning(f"Sheet '{tab_name}' has insufficient rows (need at least 4, got {len(df)})")
                         continue
                     
-                    # Get data from rows 3-249 (0-indexed), columns 11-24 (L-Y) and 26-39 (AA-AN)
+                    # Get data from rows 3-249 (0-indexed), columns 11-24 (L-Y) and 26-39 (AA-AN).
+                    # Pad to at least 40 columns so narrow sheets simply yield no complete rows.
                     max_row = min(250, len(df))
-                    l_y_data = df.iloc[3:max_row, 11:25].values  # Columns L-Y (11-24, exclusive end is 25)
-                    aa_an_data = df.iloc[3:max_row, 26:40].values  # Columns AA-AN (26-39, exclusive end is 40)
-                    
-                    # Column Y is index 13 in L-Y range, Column AN is index 13 in AA-AN range
-                    col_y_index = 13
-                    col_an_index = 13
-                    
-                    complete_rows_y = []
-                    complete_rows_an = []
-                    complete_row_details = []  # Track per-patient data for payer matching
-
-                    # Find rows where all columns L-Y and AA-AN are populated
-                    for row_idx in range(len(l_y_data)):
-                        row_l_y = l_y_data[row_idx]
-                        row_aa_an = aa_an_data[row_idx] if row_idx < len(aa_an_data) else []
-
-                        # Check if all columns L-Y are populated (14 columns)
-                        l_y_complete = len(row_l_y) >= 14 and all(
-                            pd.notna(cell) and str(cell).strip() != ''
-                            for cell in row_l_y[:14]
-                        )
-
-                        # Check if all columns AA-AN are populated (14 columns)
-                        aa_an_complete = len(row_aa_an) >= 14 and all(
-                            pd.notna(cell) and str(cell).strip() != ''
-                            for cell in row_aa_an[:14]
+                    rows = df.reindex(columns=range(max(40, df.shape[1]))).iloc[3:max_row]
+                    l_y_block = rows.iloc[:, 11:25]  # Columns L-Y (11-24, exclusive end is 25)
+                    aa_an_block = rows.iloc[:, 26:40]  # Columns AA-AN (26-39, exclusive end is 40)
+                    mask, y, an = self._complete_gg_rows(l_y_block, aa_an_block)
+                    n = int(mask.sum())
+
+                    # Track per-patient details for payer matching (Column H = first name, I = last name)
+                    complete_row_details = [
+                        {
+                            "first_name": str(fn_val).strip() if pd.notna(fn_val) else "",
+                            "last_name": str(ln_val).strip() if pd.notna(ln_val) else "",
+                            "gs": float(y_num),
+                            "pps": float(an_num),
+                            "gain": float(an_num - y_num)
+                        }
+                        for fn_val, ln_val, y_num, an_num in zip(
+                            rows.iloc[:, 7].to_numpy()[mask], rows.iloc[:, 8].to_numpy()[mask],
+                            y[mask], an[mask]
                         )
-
-                        # Row is complete only if BOTH sections are fully populated
-                        if l_y_complete and aa_an_complete:
-                            y_num = None
-                            an_num = None
-                            # Get column Y value (index 13 in L-Y range)
-                            if len(row_l_y) > col_y_index:
-                                y_value = row_l_y[col_y_index]
-                                try:
-                                    y_num = float(y_value)
-                                    complete_rows_y.append(y_num)
-                                except (ValueError, TypeError):
-                                    pass
-
-                            # Get column AN value (index 13 in AA-AN range)
-                            if len(row_aa_an) > col_an_index:
-                                an_value = row_aa_an[col_an_index]
-                                try:
-                                    an_num = float(an_value)
-                                    complete_rows_an.append(an_num)
-                                except (ValueError, TypeError):
-                                    pass
-
-                            # Track per-patient details for payer matching
-                            if y_num is not None and an_num is not None:
-                                actual_row = row_idx + 3  # offset back to df row index
-                                first_name = ""
-                                last_name = ""
-                                # Column H = index 7, Column I = index 8
-                                if len(df.columns) > 8:
-                                    fn_val = df.iloc[actual_row, 7] if actual_row < len(df) else ""
-                                    ln_val = df.iloc[actual_row, 8] if actual_row < len(df) else ""
-                                    first_name = str(fn_val).strip() if pd.notna(fn_val) else ""
-                                    last_name = str(ln_val).strip() if pd.notna(ln_val) else ""
-                                complete_row_details.append({
-                                    "first_name": first_name,
-                                    "last_name": last_name,
-                                    "gs": y_num,
-                                    "pps": an_num,
-                                    "gain": an_num - y_num
-                                })
+                    ]
 
                     # Calculate averages
-                    if complete_rows_y and complete_rows_an and len(complete_rows_y) == len(complete_rows_an):
-                        gs = sum(complete_rows_y) / len(complete_rows_y)
-                        pps = sum(complete_rows_an) / len(complete_rows_an)
+                    if n:
+                        gs = float(y[mask].mean())
+                        pps = float(an[mask].mean())
                         inc = pps - gs
 
                         results[facility_name] = {
@@ -1744,18 +1717,16 @@ class GoogleSheetsService:
                             )
                             results[facility_name].update(payer_gains)
 
-                        logger.info(f"Calculated metrics for '{facility_name}' (sheet: {tab_name}): "
-                                  f"GS={gs:.2f}, PPS={pps:.2f}, INC={inc:.2f} "
-                                  f"(from {len(complete_rows_y)} complete rows)")
+                        logger.info("Calculated metrics for '%s' (sheet: %s): GS=%.2f, PPS=%.2f, INC=%.2f (from %d complete rows)",
+                                    facility_name, tab_name, gs, pps, inc, n)
 
                         # --- Comparison mode: split GG into Puzzle vs Non-Puzzle ---
                         if comparison_mode and complete_row_details:
                             puzzle_names_set = set()
                             if puzzle_patient_names_file:
                                 try:
-                                    import json as _json
                                     with open(puzzle_patient_names_file, 'r', encoding='utf-8') as _f:
-                                        all_puzzle_names = _json.load(_f)
+                                        all_puzzle_names = json.load(_f)
                                     # Find matching facility key
                                     fac_names_list = all_puzzle_names.get(facility_name, [])
                                     if not fac_names_list:
@@ -1815,19 +1786,13 @@ class GoogleSheetsService:
                                 results[facility_name]["NP_GG_Gain_MA"] = 0
                                 results[facility_name]["NP_GG_Gain_Overall"] = 0
                     else:
-                        logger.warning(f"Insufficient complete rows for '{facility_name}' (sheet: {tab_name}): "
-                                     f"Y values: {len(complete_rows_y)}, AN values: {len(complete_rows_an)}")
+                        logger.warning("Insufficient complete rows for '%s' (sheet: %s): "
+                                       "no rows with all L-Y and AA-AN populated and numeric Y/AN values", facility_name, tab_name)
                         
                 except Exception as e:
-                    import traceback
-                    error_traceback = traceback.format_exc()
-                    logger.error(f"Error reading sheet '{tab_name}' for facility '{facility_name}': {e}")
-                    logger.error(f"Traceback: {error_traceback}")
+                    logger.exception("Error reading sheet '%s' for facility '%s': %s", tab_name, facility_name, e)
                     
         except Exception as e:
-            import traceback
-            error_traceback = traceback.format_exc()
-            logger.error(f"Error reading file '{file_path}': {e}")
-            logger.error(f"Traceback: {error_traceback}")
+            logger.exception(f"Error reading file '{file_path}': {e}")
         
         return results
@@ -4,87 +4,51 @@ Google Slides Service - Handles creating and exporting Google Slides reports
 
 from pathlib import Path
 from typing import Optional
-import os
+import csv
 import logging
-from google.oauth2 import service_account
+import asyncio
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-import pandas as pd
+
+from backend.services.google_auth import load_credentials, shared_service, thread_http
 
 logger = logging.getLogger(__name__)
 
+SCOPES = ('https://www.googleapis.com/auth/presentations',)
+
 
 class GoogleSlidesService:
     """Service for interacting with Google Slides"""
     
     def __init__(self):
         self.service = None
+        self.credentials = load_credentials(SCOPES)
         self._initialize_service()
     
     def _initialize_service(self):
-        """Initialize Google Slides API service"""
+        """Initialize Google Slides API service, reusing the shared client if one was already built"""
+        self.service = shared_service('slides', self._build_service)
+    
+    def _build_service(self):
+        """Build the Google Slides API client from the cached credentials; None if unavailable"""
+        if not self.credentials:
+            logger.warning("Google credentials unavailable. Slides features will be disabled.")
+            return None
         try:
-            import json
-            
-            SCOPES = [
-                'https://www.googleapis.com/auth/presentations'
-            ]
-            
-            # Try to get credentials from environment variable first (for cloud deployments)
-            credentials_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-            credentials = None
-            
-            if credentials_json:
-                try:
-                    # Parse JSON string from environment variable
-                    credentials_dict = json.loads(credentials_json)
-                    credentials = service_account.Credentials.from_service_account_info(
-                        credentials_dict,
-                        scopes=SCOPES
-                    )
-                    logger.info("Google Slides service initialized from GOOGLE_CREDENTIALS_JSON")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse GOOGLE_CREDENTIALS_JSON: {e}")
-                    logger.error(f"JSON content (first 100 chars): {credentials_json[:100] if credentials_json else 'None'}")
-                    credentials = None
-                except Exception as e:
-                    logger.error(f"Error creating credentials from GOOGLE_CREDENTIALS_JSON: {e}")
-                    credentials = None
-            
-            # Fall back to file path if JSON not available or failed
-            if not credentials:
-                credentials_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
-                
-                if not os.path.exists(credentials_path):
-                    logger.warning(f"Google credentials not found at {credentials_path}. Slides features will be disabled.")
-                    logger.warning(f"GOOGLE_CREDENTIALS_JSON was: {'SET' if credentials_json else 'NOT SET'}")
-                    return
-                
-                try:
-                    credentials = service_account.Credentials.from_service_account_file(
-                        credentials_path,
-                        scopes=SCOPES
-                    )
-                    logger.info(f"Google Slides service initialized from file: {credentials_path}")
-                except Exception as e:
-                    logger.error(f"Error loading credentials from file {credentials_path}: {e}")
-                    return
-            
-            if credentials:
-                self.service = build('slides', 'v1', credentials=credentials)
-                logger.info("Google Slides service initialized successfully")
-            else:
-                logger.error("Failed to load credentials - both JSON and file methods failed")
-                raise ValueError("Failed to load credentials")
-        
+            service = build('slides', 'v1', credentials=self.credentials)
+            logger.info("Google Slides service initialized successfully")
+            return service
         except Exception as e:
             logger.error(f"Failed to initialize Google Slides service: {e}")
-            self.service = None
+            return None
     
     async def create_report(self, job_id: str, summary_csv: Optional[Path] = None, 
-                           all_patients_csv: Optional[Path] = None) -> str:
+                           all_patients_csv: Optional[Path] = None,
+                           extra_requests: Optional[list] = None) -> str:
         """
         Create a Google Slides report from the processed data
+        extra_requests: additional Slides API requests (e.g. text edits) applied in the
+        same batchUpdate as the generated slides, instead of a follow-up update_slide_content call
         Returns the presentation ID
         """
         if not self.service:
@@ -92,21 +56,22 @@ class GoogleSlidesService:
             return ""
         
         try:
+            # API calls block on HTTP, so run them in a worker thread to keep the event loop free
+            # (each thread executes on its own transport, see google_auth.thread_http)
+            loop = asyncio.get_running_loop()
+            
             # Create a new presentation
-            presentation = self.service.presentations().create(
+            presentation = await loop.run_in_executor(None, lambda: self.service.presentations().create(
                 body={
                     'title': f'Facility Report - {job_id}'
                 }
-            ).execute()
+            ).execute(http=thread_http(self.credentials)))
             
             presentation_id = presentation.get('presentationId')
             logger.info(f"Created Google Slides presentation: {presentation_id}")
             
-            # Create slides with data
-            requests = []
-            
-            # Slide 1: Title slide
-            requests.append({
+            # Create slides with data - Slide 1: Title slide
+            requests = [{
                 'createSlide': {
                     'slideLayoutReference': {
                         'predefinedLayout': 'TITLE'
@@ -119,29 +84,40 @@ class GoogleSlidesService:
                         'objectId': 'title_id'
                     }]
                 }
-            })
-            
-            requests.append({
+            }, {
                 'insertText': {
                     'objectId': 'title_id',
                     'text': 'Facility Report'
                 }
-            })
+            }]
+            
+            # Scan each distinct CSV once and share the result between slides
+            csv_overviews = {}
+            for csv_file in (summary_csv, all_patients_csv):
+                if csv_file and csv_file not in csv_overviews and csv_file.exists():
+                    # An unreadable CSV only skips its own slide; the presentation already exists
+                    try:
+                        csv_overviews[csv_file] = self._read_csv_overview(csv_file)
+                    except Exception as e:
+                        logger.error(f"Error reading {csv_file.name} for slides, skipping its slide: {e}")
             
             # Add summary slide if CSV is provided
-            if summary_csv and summary_csv.exists():
-                await self._add_summary_slide(requests, summary_csv)
+            if summary_csv in csv_overviews:
+                await self._add_summary_slide(requests, csv_overviews[summary_csv])
             
             # Add patient details slide if CSV is provided
-            if all_patients_csv and all_patients_csv.exists():
-                await self._add_patients_slide(requests, all_patients_csv)
+            if all_patients_csv in csv_overviews:
+                await self._add_patients_slide(requests, csv_overviews[all_patients_csv])
+            
+            if extra_requests:
+                requests.extend(extra_requests)
             
-            # Execute all requests
+            # Execute all requests in a single batchUpdate
             if requests:
-                self.service.presentations().batchUpdate(
+                await loop.run_in_executor(None, lambda: self.service.presentations().batchUpdate(
                     presentationId=presentation_id,
                     body={'requests': requests}
-                ).execute()
+                ).execute(http=thread_http(self.credentials)))
             
             logger.info(f"Added content to Google Slides presentation")
             return presentation_id
@@ -153,72 +129,77 @@ class GoogleSlidesService:
             logger.error(f"Error building slides content: {e}")
             return ""
     
-    async def _add_summary_slide(self, requests: list, csv_file: Path):
+    @staticmethod
+    def _read_csv_overview(csv_file: Path) -> dict:
+        """
+        Single pass over a CSV returning what the slides need:
+        the header, the first data row and the number of data rows.
+        Rows are counted as CSV records (quoted multi-line fields count once), skipping blank lines.
+        """
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            columns = next(reader, [])
+            first_row = next(reader, None)
+            while first_row == []:
+                first_row = next(reader, None)
+            row_count = (1 + sum(1 for row in reader if row)) if first_row is not None else 0
+        # First row keyed by column name; short rows simply lack the trailing columns
+        first_row = dict(zip(columns, first_row or []))
+        return {'columns': columns, 'first_row': first_row, 'row_count': row_count}
+    
+    async def _add_summary_slide(self, requests: list, overview: dict):
         """Add a summary slide with data from CSV"""
         try:
-            df = pd.read_csv(csv_file)
+            columns = overview['columns']
+            first_row = overview['first_row']
+            
+            # Add title and summary text in a single insertText
+            summary_text = "\n".join(
+                f"{col}: {first_row.get(col, 'N/A')}"
+                for col in columns[:10]  # Limit to first 10 columns
+            )
             
-            # Create a new slide
+            # Create a new slide; both requests are added together so a failure leaves no partial slide
             slide_id = 'summary_slide_id'
-            requests.append({
+            requests.extend([{
                 'createSlide': {
                     'slideLayoutReference': {
                         'predefinedLayout': 'TITLE_AND_BODY'
                     },
                     'objectId': slide_id
                 }
-            })
-            
-            # Add title
-            requests.append({
+            }, {
                 'insertText': {
                     'objectId': slide_id,
                     'insertionIndex': 0,
-                    'text': 'Summary Statistics\n'
+                    'text': 'Summary Statistics\n' + summary_text
                 }
-            })
-            
-            # Add summary text
-            summary_text = "\n".join([
-                f"{col}: {df[col].iloc[0] if col in df.columns else 'N/A'}"
-                for col in df.columns[:10]  # Limit to first 10 columns
-            ])
-            
-            requests.append({
-                'insertText': {
-                    'objectId': slide_id,
-                    'insertionIndex': 1,
-                    'text': summary_text
-                }
-            })
+            }])
         
         except Exception as e:
             logger.error(f"Error adding summary slide: {e}")
     
-    async def _add_patients_slide(self, requests: list, csv_file: Path):
+    async def _add_patients_slide(self, requests: list, overview: dict):
         """Add a patients slide with data from CSV"""
         try:
-            df = pd.read_csv(csv_file)
+            patient_count = overview['row_count']
             
-            # Create a new slide
+            # Create a new slide and add its title
             slide_id = 'patients_slide_id'
-            requests.append({
+            requests.extend([{
                 'createSlide': {
                     'slideLayoutReference': {
                         'predefinedLayout': 'TITLE_AND_BODY'
                     },
                     'objectId': slide_id
                 }
-            })
-            
-            # Add title
-            requests.append({
+            }, {
                 'insertText': {
                     'objectId': slide_id,
                     'insertionIndex': 0,
-                    'text': f'Patient Details ({len(df)} patients)\n'
+                    'text': f'Patient Details ({patient_count} patients)\n'
                 }
-            })
+            }])
         
         except Exception as e:
             logger.error(f"Error adding patients slide: {e}")
@@ -226,6 +207,8 @@ class GoogleSlidesService:
     async def update_slide_content(self, presentation_id: str, slide_id: str, content: str) -> bool:
         """
         Update content of a specific slide
+        For edits known at creation time, pass them to create_report(extra_requests=...)
+        to save a round-trip.
         """
         if not self.service:
             logger.warning("Google Slides service not available")
@@ -239,10 +222,11 @@ class GoogleSlidesService:
                 }
             }]
             
-            self.service.presentations().batchUpdate(
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, lambda: self.service.presentations().batchUpdate(
                 presentationId=presentation_id,
                 body={'requests': requests}
-            ).execute()
+            ).execute(http=thread_http(self.credentials)))
             
             return True
         
@@ -5,51 +5,130 @@ Pipeline Service - Orchestrates the entire processing pipeline
 import subprocess
 import os
 import sys
+import re
 import json
+import threading
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
 import asyncio
 import logging
 import concurrent.futures
+from collections import deque
 
 from backend.services.google_sheets import GoogleSheetsService
 from backend.services.google_slides import GoogleSlidesService
 from backend.services.google_apps_script import GoogleAppsScriptService
+from backend.services.script_runner import init_worker, run_script_main
 from backend.config import job_status
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Characters replaced by '_' when normalizing output filenames (bound methods of the compiled pattern)
+_FILENAME_UNSAFE_RE = re.compile(r'[^a-z0-9_.]+')
+_FILENAME_UNSAFE_SEARCH = _FILENAME_UNSAFE_RE.search
+_FILENAME_UNSAFE_SUB = _FILENAME_UNSAFE_RE.sub
+
+# Pre-rendered banners for the error dumps written to the job log
+_PIPELINE_BANNER = "=" * 60
+_SCRIPT_BANNER = "=" * 70
+_SCRIPT_FAILED_HEADER = f"\n{_SCRIPT_BANNER}\nSCRIPT EXECUTION FAILED\n{_SCRIPT_BANNER}\n"
+_SCRIPT_FAILED_FOOTER = f"\n{_SCRIPT_BANNER}\n"
+
+# Job logs are appended as raw UTF-8 bytes (O_BINARY: no newline translation on Windows)
+_LOG_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+# Gather-write queued chunks where available (POSIX); IOV_MAX is at least 1024 there
+_LOG_WRITEV = getattr(os, "writev", None)
+_LOG_IOV_MAX = 1024
+
+# Resolved once at import - scripts live in the project root
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PYTHON_EXE = Path(sys.executable).resolve()
+UNIFIED_SCRIPT = PROJECT_ROOT / "unified_pdf_to_csv_test.py"
+LOS_SCRIPT = PROJECT_ROOT / "los-generate.py"
+COMBINER_SCRIPT = PROJECT_ROOT / "csv_combiner-test.py"
+SUMMARY_SCRIPT = PROJECT_ROOT / "summary_combiner.py"
+
+# Keys the Apps Script Web Apps have used for the generated PDF, in order of preference
+_PDF_LINK_KEYS = ("pdf_link", "pdfLink", "url", "fileUrl", "pdf_url", "pdfUrl")
+_FILE_ID_KEYS = ("file_id", "fileId", "id", "fileID")
+
+
+def _extract_pdf_link(result_data, use_file_id: bool = True):
+    """
+    Return the PDF link from an Apps Script result dict, or None.
+    Falls back to a Drive link built from the file ID when use_file_id is set.
+    """
+    if not isinstance(result_data, dict):
+        return None
+    pdf_link = next((result_data[key] for key in _PDF_LINK_KEYS if result_data.get(key)), None)
+    if not pdf_link and use_file_id:
+        file_id = next((result_data[key] for key in _FILE_ID_KEYS if result_data.get(key)), None)
+        if file_id:
+            pdf_link = f"https://drive.google.com/file/d/{file_id}/view"
+    return pdf_link
+
 
 class PipelineService:
     """Service to orchestrate the full processing pipeline"""
     
     # Configuration for parallel processing
     MAX_PARALLEL_WORKERS = 3  # Maximum number of files to process in parallel
+    MAX_PARALLEL_RENAMES = 16  # Maximum renames in flight when normalizing output filenames
+    
+    # Pure-pandas scripts whose main(argv) runs in a persistent worker process pool instead of
+    # paying interpreter start-up + pandas import per call. PDF scripts keep using a subprocess.
+    IN_PROCESS_SCRIPTS = {"csv_combiner-test.py", "summary_combiner.py"}
+    SCRIPT_TIMEOUT = 3600  # Seconds before a script run is stopped and the step fails
     
     def __init__(self):
         self.sheets_service = GoogleSheetsService()
         self.slides_service = GoogleSlidesService()
         self.apps_script_service = GoogleAppsScriptService()
         
-        # Get script paths (assuming they're in the project root)
-        self.project_root = Path(__file__).parent.parent.parent
-        self.unified_script = self.project_root / "unified_pdf_to_csv_test.py"
-        self.los_script = self.project_root / "los-generate.py"
-        self.combiner_script = self.project_root / "csv_combiner-test.py"
-        self.summary_script = self.project_root / "summary_combiner.py"
+        # Script paths (in the project root)
+        self.project_root = PROJECT_ROOT
+        self.unified_script = UNIFIED_SCRIPT
+        self.los_script = LOS_SCRIPT
+        self.combiner_script = COMBINER_SCRIPT
+        self.summary_script = SUMMARY_SCRIPT
+        
+        # Environment for script subprocesses, built once (the venv PATH does not change while running)
+        self._child_env = self._build_child_env()
+        
+        # Job log messages are queued and written by a background task (started on first _log)
+        self._log_queue = None
+        self._log_writer_task = None
+        # Raw O_APPEND descriptors per log file, reused until the job finishes
+        self._log_fds = {}
         
-        # Thread pool executor for running scripts (Windows compatible)
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        # Process pool for IN_PROCESS_SCRIPTS, created on first use.
+        # Other blocking work (script runs, renames, log writes) uses asyncio.to_thread.
+        self._process_pool = None
 
+    def _build_child_env(self) -> dict:
+        """Copy of the current environment with the venv Scripts directory on PATH for DLL dependencies"""
+        env = os.environ.copy()
+        venv_scripts = self.project_root / "venv" / "Scripts"
+        if venv_scripts.exists():
+            current_path = env.get('PATH', '')
+            venv_path = str(venv_scripts)
+            if venv_path not in current_path:
+                env['PATH'] = f"{venv_path}{os.pathsep}{current_path}"
+        return env
+    
     def _set_progress(self, job_id: str, progress: int, message: str = None):
         """
         Safely update job progress and optional message.
+        Progress never moves backwards (concurrent steps may finish out of order).
         """
         try:
             if job_id in job_status:
+                if progress < job_status[job_id].get("progress", 0):
+                    return
                 job_status[job_id]["progress"] = progress
                 if message:
                     job_status[job_id]["message"] = message
@@ -68,8 +147,7 @@ class PipelineService:
         5. Update Google Sheets
         6. Generate Google Slides report
         """
-        log_file = Path("logs") / f"{job_id}.log"
-        log_file.parent.mkdir(exist_ok=True)
+        log_file = Path("logs") / f"{job_id}.log"  # directory is created by the log writer
         
         results = {
             "job_id": job_id,
@@ -94,8 +172,8 @@ class PipelineService:
             adt_pdfs_dir = Path(job_dir) / "ADT"
             los_pdfs_dir = Path(job_dir) / "LOS"
             
-            has_adt = adt_pdfs_dir.exists() and list(adt_pdfs_dir.glob("*.pdf"))
-            has_los = los_pdfs_dir.exists() and list(los_pdfs_dir.glob("*.pdf"))
+            has_adt = self._has_pdfs(adt_pdfs_dir)
+            has_los = self._has_pdfs(los_pdfs_dir)
             
             async def process_adt():
                 """Process ADT files"""
@@ -173,11 +251,12 @@ class PipelineService:
             summary_dir = Path("outputs") / job_id / "summary"
             summary_dir.mkdir(parents=True, exist_ok=True)
             
-            # Generate all_patients.csv
+            # Generate master_summary.csv and all_patients.csv in one run
             await self._run_script(
                 self.summary_script,
                 [
                     str(combined_dir),
+                    str(summary_dir / "master_summary.csv"),
                     "--all-patients",
                     str(summary_dir / "all_patients.csv"),
                     "--add-metrics"
@@ -185,17 +264,6 @@ class PipelineService:
                 log_file
             )
             
-            # Generate master_summary.csv
-            await self._run_script(
-                self.summary_script,
-                [
-                    str(combined_dir),
-                    str(summary_dir / "master_summary.csv"),
-                    "--add-metrics"
-                ],
-                log_file
-            )
-            
             results["outputs"]["summary"] = str(summary_dir)
             results["steps_completed"].append("summary")
             await self._log(log_file, f"[{datetime.now()}] [OK] Summary generation complete")
@@ -219,12 +287,12 @@ class PipelineService:
                 # Auto-fetch GS, PPS, INC from Google Sheet
                 await self._log(log_file, f"[{datetime.now()}] Step 5.1: Auto-fetching GS, PPS, INC from Google Sheet...")
                 try:
-                    # Read facility names from master_summary.csv
+                    # Read facility names from master_summary.csv - only the Facility column is parsed
                     import pandas as pd
-                    # Keep ratio columns as strings to prevent automatic time conversion
-                    ratio_columns = ['HD', 'HDN', 'HT', 'Ex', 'Cus', 'AL', 'OT', 'SNF', 'Managed Care Ratio', 'Medicare A Ratio']
-                    dtype_dict = {col: str for col in ratio_columns}
-                    df = pd.read_csv(master_summary_path, dtype=dtype_dict)
+                    # Parsed in a worker thread so the event loop keeps serving status/log requests
+                    df = await asyncio.to_thread(
+                        pd.read_csv, master_summary_path, usecols=lambda col: col == 'Facility', dtype=str
+                    )
                     facility_names = df['Facility'].unique().tolist() if 'Facility' in df.columns else []
                     
                     if facility_names:
@@ -249,7 +317,7 @@ class PipelineService:
                         if google_sheet_file:
                             # Read from uploaded file
                             await self._log(log_file, f"[{datetime.now()}] Reading metrics from uploaded file: {google_sheet_file}")
-                            auto_metrics = self.sheets_service.fetch_facility_metrics_from_file(
+                            auto_metrics = await self.sheets_service.fetch_facility_metrics_from_file_async(
                                 facility_names,
                                 file_path=google_sheet_file,
                                 los_csv_dir=str(los_output_dir),
@@ -259,26 +327,30 @@ class PipelineService:
                         elif user_sheet_id:
                             # Fetch from Google Sheet using provided ID
                             await self._log(log_file, f"[{datetime.now()}] Reading metrics from Google Sheet ID: {user_sheet_id}")
-                            auto_metrics = self.sheets_service.fetch_facility_metrics(facility_names, sheet_id=user_sheet_id)
+                            auto_metrics = await self.sheets_service.fetch_facility_metrics_async(facility_names, sheet_id=user_sheet_id)
                         else:
                             # Use default from env var
                             await self._log(log_file, f"[{datetime.now()}] Using default Google Sheet from env var")
-                            auto_metrics = self.sheets_service.fetch_facility_metrics(facility_names, sheet_id=None)
+                            auto_metrics = await self.sheets_service.fetch_facility_metrics_async(facility_names, sheet_id=None)
                         
                         # Combine auto-fetched metrics with manual quarter value
-                        facility_values = {}
+                        facility_values = {name: auto_metrics[name] for name in facility_names if name in auto_metrics}
+                        await self._log(log_file, f"[{datetime.now()}] Fetched metrics for {len(facility_values)}/{len(facility_names)} facilities")
+                        
+                        # Per-facility details go to the job log in one write
+                        now = datetime.now()
+                        metric_lines = []
                         for facility_name in facility_names:
-                            if facility_name in auto_metrics:
-                                facility_values[facility_name] = auto_metrics[facility_name]
-                                metrics = auto_metrics[facility_name]
-                                await self._log(log_file, f"[{datetime.now()}] Auto-fetched for {facility_name}: GS={metrics.get('GS', 'N/A')}, PPS={metrics.get('PPS', 'N/A')}, INC={metrics.get('INC', 'N/A')}, GG_Gain_MC={metrics.get('GG_Gain_MC', 'N/A')}, GG_Gain_MA={metrics.get('GG_Gain_MA', 'N/A')}, GG_Gain_Overall={metrics.get('GG_Gain_Overall', 'N/A')}")
-                                if comparison_mode:
-                                    np_keys = [k for k in metrics.keys() if k.startswith('NP_')]
-                                    if np_keys:
-                                        np_info = ", ".join(f"{k}={metrics[k]}" for k in np_keys)
-                                        await self._log(log_file, f"[{datetime.now()}]   NP_ metrics for {facility_name}: {np_info}")
-                            else:
-                                await self._log(log_file, f"[{datetime.now()}] [WARNING] Could not fetch metrics for {facility_name}")
+                            metrics = facility_values.get(facility_name)
+                            if metrics is None:
+                                metric_lines.append(f"[{now}] [WARNING] Could not fetch metrics for {facility_name}")
+                                continue
+                            metric_lines.append(f"[{now}] Auto-fetched for {facility_name}: GS={metrics.get('GS', 'N/A')}, PPS={metrics.get('PPS', 'N/A')}, INC={metrics.get('INC', 'N/A')}, GG_Gain_MC={metrics.get('GG_Gain_MC', 'N/A')}, GG_Gain_MA={metrics.get('GG_Gain_MA', 'N/A')}, GG_Gain_Overall={metrics.get('GG_Gain_Overall', 'N/A')}")
+                            if comparison_mode:
+                                np_info = ", ".join(f"{k}={v}" for k, v in metrics.items() if k.startswith('NP_'))
+                                if np_info:
+                                    metric_lines.append(f"[{now}]   NP_ metrics for {facility_name}: {np_info}")
+                        await self._log_batch(log_file, metric_lines)
                         
                         # Add quarter from manual input if provided
                         if manual_facility_values and '_quarter' in manual_facility_values:
@@ -305,9 +377,12 @@ class PipelineService:
                 await self._log(log_file, f"[{datetime.now()}] [OK] Google Sheets updated")
                 self._set_progress(job_id, 75, "Sheets updated")
                 
-                # Wait a few seconds for Test sheet formulas to calculate
+                # Wait for Test sheet formulas to calculate - poll the Summary formulas that read Raw_Data
+                # rather than a fixed sleep (Raw_Data itself holds pasted values, ready as soon as written)
                 await self._log(log_file, f"[{datetime.now()}] Waiting for Test sheet formulas to calculate...")
-                await asyncio.sleep(5)  # Wait 5 seconds for formulas
+                if not await self.sheets_service.wait_for_recalc(self.sheets_service.test_sheet_id,
+                                                                 self.sheets_service.test_sheet_recalc_range):
+                    await self._log(log_file, f"[{datetime.now()}] [WARNING] Test sheet not confirmed ready, continuing anyway")
                 
                 # Step 5.4: Copy data from Raw_Data to Facility_Data tab
                 await self._log(log_file, f"[{datetime.now()}] Step 5.4: Copying data from Raw_Data to Facility_Data tab...")
@@ -318,26 +393,19 @@ class PipelineService:
                     self._set_progress(job_id, 80, "Facility Data updated")
                 else:
                     await self._log(log_file, f"[{datetime.now()}] [WARNING] Failed to copy data to Facility_Data tab")
-                
-                # Step 5.5: Generate Test Fac PDF using Apps Script
+            
+            # Steps 5.5, 6 and 7 are independent Apps Script / Slides calls, so run them concurrently
+            async def generate_test_fac_pdf():
+                """Step 5.5: Generate Test Fac PDF using Apps Script"""
                 await self._log(log_file, f"[{datetime.now()}] Step 5.5: Generating Test Fac PDF via Apps Script...")
                 test_fac_pdf_result = await self.apps_script_service.generate_test_fac_pdf(comparison_mode=comparison_mode)
                 if test_fac_pdf_result.get("success"):
                     results["steps_completed"].append("test_fac_pdf_generation")
                     result_data = test_fac_pdf_result.get("result", {})
-                    test_fac_pdf_link = None
                     
                     await self._log(log_file, f"[{datetime.now()}] Test Fac Apps Script response: {json.dumps(result_data, indent=2)}")
                     
-                    if isinstance(result_data, dict):
-                        test_fac_pdf_link = (
-                            result_data.get("pdf_link") or 
-                            result_data.get("pdfLink") or 
-                            result_data.get("url") or
-                            result_data.get("fileUrl") or
-                            result_data.get("pdf_url") or
-                            result_data.get("pdfUrl")
-                        )
+                    test_fac_pdf_link = _extract_pdf_link(result_data, use_file_id=False)
                     
                     if test_fac_pdf_link:
                         results["links"]["test_fac_pdf"] = test_fac_pdf_link
@@ -351,73 +419,60 @@ class PipelineService:
                 else:
                     await self._log(log_file, f"[{datetime.now()}] [WARNING] Test Fac PDF generation failed: {test_fac_pdf_result.get('error', 'Unknown error')}")
             
-            # Step 6: Generate Facility Summary PDF using Apps Script
-            await self._log(log_file, f"[{datetime.now()}] Step 6: Generating Facility Summary PDF via Apps Script...")
-            pdf_result = await self.apps_script_service.generate_pdf(comparison_mode=comparison_mode)
-            if pdf_result.get("success"):
-                results["steps_completed"].append("pdf_generation")
-                # Extract PDF link from result if available
-                result_data = pdf_result.get("result", {})
-                pdf_link = None
-                
-                # Log the full response for debugging
-                await self._log(log_file, f"[{datetime.now()}] Apps Script response: {json.dumps(result_data, indent=2)}")
-                
-                # Check various possible fields for PDF link
-                if isinstance(result_data, dict):
-                    pdf_link = (
-                        result_data.get("pdf_link") or 
-                        result_data.get("pdfLink") or 
-                        result_data.get("url") or
-                        result_data.get("fileUrl") or
-                        result_data.get("pdf_url") or
-                        result_data.get("pdfUrl")
-                    )
+            async def generate_facility_pdf():
+                """Step 6: Generate Facility Summary PDF using Apps Script"""
+                await self._log(log_file, f"[{datetime.now()}] Step 6: Generating Facility Summary PDF via Apps Script...")
+                pdf_result = await self.apps_script_service.generate_pdf(comparison_mode=comparison_mode)
+                if pdf_result.get("success"):
+                    results["steps_completed"].append("pdf_generation")
+                    # Extract PDF link from result if available
+                    result_data = pdf_result.get("result", {})
                     
-                    # If we have a file ID, construct the Drive link
-                    if not pdf_link:
-                        file_id = (
-                            result_data.get("file_id") or 
-                            result_data.get("fileId") or 
-                            result_data.get("id") or
-                            result_data.get("fileID")
-                        )
-                        if file_id:
-                            pdf_link = f"https://drive.google.com/file/d/{file_id}/view"
-                
-                if pdf_link:
-                    results["links"]["generated_pdf"] = pdf_link
-                    await self._log(log_file, f"[{datetime.now()}] [OK] PDF generated via Apps Script: {pdf_link}")
-                    self._set_progress(job_id, 95, "Facility Summary PDF generated")
+                    # Log the full response for debugging
+                    await self._log(log_file, f"[{datetime.now()}] Apps Script response: {json.dumps(result_data, indent=2)}")
+                    
+                    # Check the known link fields, then fall back to a Drive link from the file ID
+                    pdf_link = _extract_pdf_link(result_data)
+                    
+                    if pdf_link:
+                        results["links"]["generated_pdf"] = pdf_link
+                        await self._log(log_file, f"[{datetime.now()}] [OK] PDF generated via Apps Script: {pdf_link}")
+                        self._set_progress(job_id, 95, "Facility Summary PDF generated")
+                    else:
+                        # Use the default Google Drive folder link as fallback
+                        default_drive_folder = "https://drive.google.com/drive/folders/1DOThKA_GrOHzDZomzjOxnYfzCjVNWCql?usp=drive_link"
+                        results["links"]["generated_pdf"] = default_drive_folder
+                        await self._log(log_file, f"[{datetime.now()}] [OK] PDF generated via Apps Script (using default Drive folder link)")
+                        await self._log(log_file, f"[{datetime.now()}] [DEBUG] Response keys: {list(result_data.keys()) if isinstance(result_data, dict) else 'Not a dict'}")
                 else:
-                    # Use the default Google Drive folder link as fallback
-                    default_drive_folder = "https://drive.google.com/drive/folders/1DOThKA_GrOHzDZomzjOxnYfzCjVNWCql?usp=drive_link"
-                    results["links"]["generated_pdf"] = default_drive_folder
-                    await self._log(log_file, f"[{datetime.now()}] [OK] PDF generated via Apps Script (using default Drive folder link)")
-                    await self._log(log_file, f"[{datetime.now()}] [DEBUG] Response keys: {list(result_data.keys()) if isinstance(result_data, dict) else 'Not a dict'}")
-            else:
-                error_msg = pdf_result.get("error", "Unknown error")
-                await self._log(log_file, f"[{datetime.now()}] [WARNING] PDF generation failed: {error_msg}")
-                results["errors"].append(f"PDF generation: {error_msg}")
-                # Continue without PDF - don't fail the entire pipeline
+                    error_msg = pdf_result.get("error", "Unknown error")
+                    await self._log(log_file, f"[{datetime.now()}] [WARNING] PDF generation failed: {error_msg}")
+                    results["errors"].append(f"PDF generation: {error_msg}")
+                    # Continue without PDF - don't fail the entire pipeline
             
-            # Step 7: Generate Google Slides report
-            await self._log(log_file, f"[{datetime.now()}] Step 7: Generating Google Slides report...")
-            slides_id = await self.slides_service.create_report(
-                job_id,
-                master_summary_path if master_summary_path.exists() else None,
-                summary_dir / "all_patients.csv" if (summary_dir / "all_patients.csv").exists() else None
-            )
+            async def generate_slides():
+                """Step 7: Generate Google Slides report"""
+                await self._log(log_file, f"[{datetime.now()}] Step 7: Generating Google Slides report...")
+                slides_id = await self.slides_service.create_report(
+                    job_id,
+                    master_summary_path if master_summary_path.exists() else None,
+                    summary_dir / "all_patients.csv" if (summary_dir / "all_patients.csv").exists() else None
+                )
+                
+                if slides_id:
+                    results["links"]["google_slides"] = f"https://docs.google.com/presentation/d/{slides_id}"
+                    results["steps_completed"].append("slides_creation")
+                    await self._log(log_file, f"[{datetime.now()}] [OK] Google Slides report created (ID: {slides_id})")
+                else:
+                    error_msg = "Google Slides report creation failed - no presentation ID returned"
+                    await self._log(log_file, f"[{datetime.now()}] [WARNING] {error_msg}")
+                    results["errors"].append(error_msg)
+                    # Continue without slides - don't fail the entire pipeline
             
-            if slides_id:
-                results["links"]["google_slides"] = f"https://docs.google.com/presentation/d/{slides_id}"
-                results["steps_completed"].append("slides_creation")
-                await self._log(log_file, f"[{datetime.now()}] [OK] Google Slides report created (ID: {slides_id})")
-            else:
-                error_msg = "Google Slides report creation failed - no presentation ID returned"
-                await self._log(log_file, f"[{datetime.now()}] [WARNING] {error_msg}")
-                results["errors"].append(error_msg)
-                # Continue without slides - don't fail the entire pipeline
+            report_steps = [generate_facility_pdf(), generate_slides()]
+            if master_summary_path.exists():
+                report_steps.insert(0, generate_test_fac_pdf())
+            await self._run_steps_concurrently(report_steps)
             
             await self._log(log_file, f"[{datetime.now()}] ===== PIPELINE COMPLETE =====")
             
@@ -426,22 +481,25 @@ class PipelineService:
             error_msg = str(e) if str(e) else repr(e)
             error_traceback = traceback.format_exc()
             
-            # Log detailed error
-            await self._log(log_file, f"\n{'='*60}")
-            await self._log(log_file, f"[{datetime.now()}] ERROR OCCURRED!")
-            await self._log(log_file, f"Error Type: {type(e).__name__}")
-            await self._log(log_file, f"Error Message: {error_msg}")
-            await self._log(log_file, f"{'='*60}")
-            await self._log(log_file, "Full Traceback:")
-            # Write traceback line by line for better visibility
-            for line in error_traceback.split('\n'):
-                await self._log(log_file, line)
-            await self._log(log_file, f"{'='*60}\n")
+            # Log detailed error (one write for the whole dump)
+            await self._log(log_file, "\n".join([
+                f"\n{_PIPELINE_BANNER}",
+                f"[{datetime.now()}] ERROR OCCURRED!",
+                f"Error Type: {type(e).__name__}",
+                f"Error Message: {error_msg}",
+                _PIPELINE_BANNER,
+                "Full Traceback:",
+                error_traceback,
+                f"{_PIPELINE_BANNER}\n",
+            ]))
             
             results["errors"].append(error_msg)
             results["error_traceback"] = error_traceback
             logger.error(f"Pipeline error for job {job_id}: {error_msg}", exc_info=True)
             raise
+        finally:
+            # Make sure the job log is complete (and its handle closed) before the job is reported as finished
+            await self._close_log(log_file)
         
         return results
     
@@ -451,106 +509,158 @@ class PipelineService:
             raise FileNotFoundError(f"Script not found: {script_path}")
         
         # Use absolute path to Python executable
-        python_exe = Path(sys.executable).resolve()
-        script_path_abs = script_path.resolve()
+        python_exe = PYTHON_EXE
+        script_path_abs = script_path if script_path.is_absolute() else script_path.resolve()
         
         await self._log(log_file, f"Python executable: {python_exe}")
         
         cmd = [str(python_exe), str(script_path_abs)] + [str(arg) if isinstance(arg, Path) else str(arg) for arg in args]
         
-        await self._log(log_file, f"Running command: {' '.join(cmd)}")
+        cmd_str = ' '.join(cmd)  # reused by the failure messages below
+        await self._log(log_file, f"Running command: {cmd_str}")
         await self._log(log_file, f"Working directory: {self.project_root}")
         
-        def run_script_sync():
-            """Run script synchronously - Windows compatible"""
+        def run_script_sync(emit):
+            """
+            Run script synchronously - Windows compatible
+            Streams each output line to emit(stream, line) as it is produced and returns the exit code.
+            """
             try:
-                # Prepare environment with current environment variables
-                env = os.environ.copy()
+                # argv list without a shell on every platform - the venv PATH in _child_env is passed
+                # through env, so child DLL loading does not need cmd.exe
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=str(self.project_root),
+                    env=self._child_env,
+                    shell=False,
+                    text=True,
+                    encoding='utf-8',
+                    errors='replace',
+                    bufsize=1
+                )
                 
-                # Ensure PATH includes venv Scripts directory for DLL dependencies
-                venv_scripts = self.project_root / "venv" / "Scripts"
-                if venv_scripts.exists():
-                    current_path = env.get('PATH', '')
-                    venv_path = str(venv_scripts)
-                    if venv_path not in current_path:
-                        env['PATH'] = f"{venv_path};{current_path}"
+                def pump(pipe, stream):
+                    for line in pipe:
+                        emit(stream, line.rstrip('\n'))
+                    pipe.close()
                 
-                # On Windows, use shell=True to help with DLL loading
-                if os.name == 'nt':  # Windows
-                    # Format command properly for Windows cmd.exe - quote paths with spaces
-                    def quote_arg(arg):
-                        arg_str = str(arg)
-                        if ' ' in arg_str or arg_str.startswith('-'):
-                            return f'"{arg_str}"'
-                        return arg_str
-                    shell_cmd = ' '.join(quote_arg(arg) for arg in cmd)
-                    result = subprocess.run(
-                        shell_cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        cwd=str(self.project_root.resolve()),
-                        env=env,
-                        shell=True,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        timeout=3600
-                    )
-                else:
-                    # On Unix-like systems, use list format without shell
-                    result = subprocess.run(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        cwd=str(self.project_root.resolve()),
-                        env=env,
-                        shell=False,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        timeout=3600
-                    )
-                return result.returncode, result.stdout, result.stderr
-            except subprocess.TimeoutExpired:
-                return -1, "", "Script execution timed out after 1 hour"
+                # Kill the script if it runs longer than an hour
+                timed_out = threading.Event()
+                def on_timeout():
+                    timed_out.set()
+                    process.kill()
+                timer = threading.Timer(self.SCRIPT_TIMEOUT, on_timeout)
+                timer.start()
+                
+                # Read stderr on a helper thread so neither pipe can fill up and block the child
+                stderr_reader = threading.Thread(target=pump, args=(process.stderr, "stderr"), daemon=True)
+                stderr_reader.start()
+                try:
+                    pump(process.stdout, "stdout")
+                    stderr_reader.join()
+                    returncode = process.wait()
+                finally:
+                    timer.cancel()
+                
+                if timed_out.is_set():
+                    emit("stderr", "Script execution timed out after 1 hour")
+                    return -1
+                return returncode
             except Exception as e:
-                return -1, "", f"Error running script: {str(e)}"
+                emit("stderr", f"Error running script: {str(e)}")
+                return -1
+        
+        # Only the last 20 non-blank lines of each stream are kept for the failure message
+        output_tails = {"stdout": deque(maxlen=20), "stderr": deque(maxlen=20)}
+        streams_seen = set()
+        
+        def collect_output(stream, line, log_lines):
+            """Keep the line's tail entry for error reporting and queue it for the job log"""
+            streams_seen.add(stream)
+            stripped = line.strip()
+            if stripped:
+                output_tails[stream].append(stripped)
+                log_lines.append(f"[STDERR] {line}" if stream == "stderr" else line)
         
         try:
-            # Run in thread executor to avoid blocking and Windows asyncio issues
-            loop = asyncio.get_event_loop()
-            returncode, stdout_text, stderr_text = await loop.run_in_executor(
-                self.executor, run_script_sync
-            )
+            loop = asyncio.get_running_loop()
+            returncode = None
             
-            # Split output into lines and log
-            stdout_lines = stdout_text.split('\n') if stdout_text else []
-            stderr_lines = stderr_text.split('\n') if stderr_text else []
+            if script_path.name in self.IN_PROCESS_SCRIPTS:
+                # Call main(argv) in a warm worker process: no interpreter start-up per run,
+                # and the pandas work does not hold this process's GIL. Its output reaches the
+                # job log when the script finishes, not line by line as with the subprocess path
+                await self._log(log_file, f"Running in worker process: {script_path.name}")
+                try:
+                    returncode, stdout_text, stderr_text = await asyncio.wait_for(
+                        loop.run_in_executor(
+                            self._get_process_pool(), run_script_main, str(script_path_abs), cmd[2:]
+                        ),
+                        self.SCRIPT_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    # Same failure as the subprocess path; the hung worker goes with the old pool
+                    self._shutdown_process_pool(terminate=True)
+                    returncode, stdout_text, stderr_text = -1, "", "Script execution timed out after 1 hour"
+                except concurrent.futures.BrokenExecutor as e:
+                    self._process_pool = None
+                    stderr_text = f"Worker process pool failed: {e}"
+                if returncode is None:
+                    await self._log(log_file, f"[WARNING] {stderr_text} - falling back to subprocess")
+                else:
+                    log_lines = []
+                    for line in stdout_text.split('\n') if stdout_text else []:
+                        collect_output("stdout", line, log_lines)
+                    for line in stderr_text.split('\n') if stderr_text else []:
+                        collect_output("stderr", line, log_lines)
+                    await self._log_batch(log_file, log_lines)
             
-            # Log all output (with error handling)
-            try:
-                for line in stdout_lines:
-                    if line.strip():
-                        await self._log(log_file, line)
+            if returncode is None:
+                # Run in a worker thread to avoid blocking and Windows asyncio issues;
+                # output lines are handed back through a queue and logged while the script runs
+                line_queue = asyncio.Queue()
+                def emit(stream, line):
+                    loop.call_soon_threadsafe(line_queue.put_nowait, (stream, line))
+                def run_and_close():
+                    try:
+                        return run_script_sync(emit)
+                    finally:
+                        loop.call_soon_threadsafe(line_queue.put_nowait, None)
                 
-                for line in stderr_lines:
-                    if line.strip():
-                        await self._log(log_file, f"[STDERR] {line}")
-            except Exception as log_error:
-                await self._log(log_file, f"[WARNING] Error while logging output: {log_error}")
+                script_future = asyncio.create_task(asyncio.to_thread(run_and_close))
+                finished = False
+                while not finished:
+                    # Wait for the next line, then take everything else already queued
+                    # and write it to the log in one go
+                    items = [await line_queue.get()]
+                    while not line_queue.empty():
+                        items.append(line_queue.get_nowait())
+                    log_lines = []
+                    for item in items:
+                        if item is None:
+                            finished = True
+                        else:
+                            collect_output(*item, log_lines)
+                    await self._log_batch(log_file, log_lines)
+                returncode = await script_future
             
             if returncode != 0:
                 # Convert Windows error codes to readable messages
                 error_code_msg = ""
                 if returncode == 3221225794 or returncode == -1073741515:  # 0xC0000135
-                    error_code_msg = "\n[WINDOWS ERROR] DLL initialization failed or missing dependency."
-                    error_code_msg += "\nThis usually means:"
-                    error_code_msg += "\n1. Missing Visual C++ Redistributable"
-                    error_code_msg += "\n2. Corrupted Python installation"
-                    error_code_msg += "\n3. Virtual environment issues"
-                    error_code_msg += "\nFix: Install Visual C++ Redistributable from: https://aka.ms/vs/17/release/vc_redist.x64.exe"
-                    error_code_msg += f"\nPython executable: {sys.executable}"
-                    error_code_msg += f"\nTry running manually: {' '.join(cmd)}"
+                    error_code_msg = "\n".join([
+                        "",
+                        "[WINDOWS ERROR] DLL initialization failed or missing dependency.",
+                        "This usually means:",
+                        "1. Missing Visual C++ Redistributable",
+                        "2. Corrupted Python installation",
+                        "3. Virtual environment issues",
+                        "Fix: Install Visual C++ Redistributable from: https://aka.ms/vs/17/release/vc_redist.x64.exe",
+                        f"Python executable: {sys.executable}",
+                        f"Try running manually: {cmd_str}",
+                    ])
                     
                     # Log the error message before raising
                     try:
@@ -558,63 +668,275 @@ class PipelineService:
                     except:
                         pass  # If logging fails, continue anyway
                 
-                error_msg = f"Script failed with return code {returncode}"
+                # Collect the sections and join once
+                error_parts = [f"Script failed with return code {returncode}"]
                 if error_code_msg:
-                    error_msg += error_code_msg
+                    error_parts.append(error_code_msg)
                 
-                if stderr_lines:
-                    last_stderr = [l.strip() for l in stderr_lines if l.strip()][-20:]
+                if "stderr" in streams_seen:
+                    last_stderr = output_tails["stderr"]
                     if last_stderr:
-                        error_msg += f"\n\nSTDERR (last 20 lines):\n" + "\n".join(last_stderr)
+                        error_parts.append(f"\n\nSTDERR (last 20 lines):\n" + "\n".join(last_stderr))
                     else:
-                        error_msg += f"\n\nNo STDERR output captured (script may have crashed immediately)"
+                        error_parts.append(f"\n\nNo STDERR output captured (script may have crashed immediately)")
                 
-                if stdout_lines:
-                    last_stdout = [l.strip() for l in stdout_lines if l.strip()][-20:]
+                if "stdout" in streams_seen:
+                    last_stdout = output_tails["stdout"]
                     if last_stdout:
-                        error_msg += f"\n\nSTDOUT (last 20 lines):\n" + "\n".join(last_stdout)
+                        error_parts.append(f"\n\nSTDOUT (last 20 lines):\n" + "\n".join(last_stdout))
                     else:
-                        error_msg += f"\n\nNo STDOUT output captured (script may have crashed immediately)"
+                        error_parts.append(f"\n\nNo STDOUT output captured (script may have crashed immediately)")
                 
                 # Add command info for debugging
-                error_msg += f"\n\nCommand that failed: {' '.join(cmd)}"
-                error_msg += f"\nWorking directory: {self.project_root}"
-                error_msg += f"\nPython executable: {sys.executable}"
+                error_parts.append(f"\n\nCommand that failed: {cmd_str}")
+                error_parts.append(f"\nWorking directory: {self.project_root}")
+                error_parts.append(f"\nPython executable: {sys.executable}")
+                error_msg = "".join(error_parts)
                 
-                # Log the complete error message before raising
+                # Log the complete error message before raising (banner and message in one write)
                 try:
-                    await self._log(log_file, f"\n{'='*70}")
-                    await self._log(log_file, "SCRIPT EXECUTION FAILED")
-                    await self._log(log_file, f"{'='*70}")
-                    await self._log(log_file, error_msg)
-                    await self._log(log_file, f"{'='*70}\n")
+                    await self._log(log_file, _SCRIPT_FAILED_HEADER + error_msg + _SCRIPT_FAILED_FOOTER)
                 except Exception as log_err:
                     # If logging fails, at least print it
-                    print(f"Error logging failed: {log_err}")
-                    print(error_msg)
+                    print(f"Error logging failed: {log_err}", file=sys.stderr, flush=True)
+                    print(error_msg, file=sys.stderr, flush=True)
                 
                 raise RuntimeError(error_msg)
                 
         except Exception as e:
-            await self._log(log_file, f"Exception running script: {type(e).__name__}: {str(e)}")
             import traceback
-            await self._log(log_file, traceback.format_exc())
+            await self._log(log_file, f"Exception running script: {type(e).__name__}: {str(e)}\n{traceback.format_exc()}")
             raise
     
+    @staticmethod
+    async def _run_steps_concurrently(steps: list):
+        """
+        Run independent pipeline steps (coroutines) concurrently.
+        Every step finishes before the first failure, in step order, is re-raised,
+        so no step is left running when the pipeline reports an error.
+        """
+        for step_result in await asyncio.gather(*steps, return_exceptions=True):
+            if isinstance(step_result, BaseException):
+                raise step_result
+    
+    def _get_process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Lazily create the worker process pool for IN_PROCESS_SCRIPTS.
+        Uses the spawn context so behaviour matches on Windows and Linux;
+        workers run from the project root like the subprocess path (cwd=project_root).
+        """
+        if self._process_pool is None:
+            self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, self.MAX_PARALLEL_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(str(self.project_root),)
+            )
+        return self._process_pool
+    
+    def _shutdown_process_pool(self, terminate: bool = False):
+        """
+        Shut down the worker process pool without waiting; the next in-process run creates a new one.
+        With terminate=True, workers still running a script are stopped as well.
+        """
+        pool, self._process_pool = self._process_pool, None
+        if pool is None:
+            return
+        # Snapshot the workers first: shutdown() clears the pool's process table
+        workers = list((getattr(pool, "_processes", None) or {}).values()) if terminate else []
+        pool.shutdown(wait=False, cancel_futures=True)
+        for worker in workers:
+            worker.terminate()
+    
+    @staticmethod
+    def _has_pdfs(directory: Path) -> bool:
+        """True if directory contains at least one *.pdf entry (stops at the first match)"""
+        try:
+            with os.scandir(directory) as entries:
+                # normcase matches glob's case handling: case-insensitive on Windows only
+                return any(os.path.normcase(entry.name).endswith('.pdf') for entry in entries)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+    
+    @staticmethod
+    def _plan_filename_renames(directory: str) -> list:
+        """
+        [(old_name, new_name)] for files in directory not yet in lowercase underscore style.
+        A target that is already taken (e.g. Foo.csv and foo.csv) gets a _1, _2, ... suffix
+        instead of silently overwriting the other file.
+        """
+        taken = set()
+        candidates = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                taken.add(entry.name)
+                # Already lowercase/underscore names need no new string at all
+                if _FILENAME_UNSAFE_SEARCH(entry.name) is None or not entry.is_file():
+                    continue
+                stem, suffix = os.path.splitext(entry.name)
+                new_stem = _FILENAME_UNSAFE_SUB('_', stem.lower())
+                suffix = suffix.lower()
+                if new_stem + suffix != entry.name:
+                    candidates.append((entry.name, new_stem, suffix))
+        
+        renames = []
+        for old_name, new_stem, suffix in sorted(candidates):
+            new_name = new_stem + suffix
+            counter = 1
+            while new_name in taken:
+                new_name = f"{new_stem}_{counter}{suffix}"
+                counter += 1
+            taken.add(new_name)
+            renames.append((old_name, new_name))
+        return renames
+    
     async def _normalize_filenames(self, directory: Path, log_file: Path):
         """Normalize filenames to lowercase underscore style"""
-        import re
-        for file_path in directory.glob("*"):
-            if file_path.is_file():
-                new_name = re.sub(r'[^a-z0-9_.]+', '_', file_path.stem.lower()) + file_path.suffix.lower()
-                if new_name != file_path.name:
-                    new_path = file_path.parent / new_name
-                    file_path.rename(new_path)
-                    await self._log(log_file, f"Renamed: {file_path.name} → {new_name}")
+        renames = await asyncio.to_thread(self._plan_filename_renames, str(directory))
+        
+        # Targets are already-normalized names and sources never are, so the renames are independent
+        dir_prefix = os.path.join(str(directory), "")  # directory plus trailing separator, built once
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_RENAMES)
+        
+        async def rename(old_name, new_name):
+            async with semaphore:
+                await asyncio.to_thread(os.rename, dir_prefix + old_name, dir_prefix + new_name)
+        
+        await asyncio.gather(*(rename(old_name, new_name) for old_name, new_name in renames))
+        await self._log_batch(log_file, [f"Renamed: {old_name} → {new_name}" for old_name, new_name in renames])
     
     async def _log(self, log_file: Path, message: str):
-        """Append message to log file"""
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(message + "\n")
-            f.flush()
\ No newline at end of file
+        """Queue message for the background log writer"""
+        self._get_log_queue().put_nowait((log_file, message + "\n"))
+    
+    async def _log_batch(self, log_file: Path, lines: list):
+        """Queue several lines for the background log writer as one chunk"""
+        if not lines:
+            return
+        self._get_log_queue().put_nowait((log_file, "".join(line + "\n" for line in lines)))
+    
+    async def _flush_log(self):
+        """Wait until every queued log message has been written"""
+        if self._log_queue is not None and not self._log_writer_task.done():
+            await self._log_queue.join()
+    
+    async def _close_log(self, log_file: Path):
+        """Write out queued messages and close the cached descriptor for one log file"""
+        await self._close_log_fds([log_file])
+    
+    async def aclose(self):
+        """
+        Write out queued messages, close every cached log descriptor, stop the worker processes
+        and close the Apps Script HTTP client
+        """
+        # Drain first so descriptors opened by still-queued writes are included
+        await self._flush_log()
+        await self._close_log_fds(list(self._log_fds))
+        self._shutdown_process_pool()
+        await self.apps_script_service.aclose()
+    
+    async def _close_log_fds(self, log_files: list):
+        """
+        Close descriptors through the writer task (queued after any pending text)
+        so every descriptor operation stays on the writer's thread.
+        Waits only for these closes, not for other jobs' queued output.
+        """
+        if self._log_writer_task is not None and not self._log_writer_task.done():
+            loop = asyncio.get_running_loop()
+            closed = []
+            for log_file in log_files:
+                done = loop.create_future()
+                self._log_queue.put_nowait((log_file, done))
+                closed.append(done)
+            await asyncio.gather(*closed)
+        else:
+            self._close_fds(log_files)
+    
+    def _get_log_queue(self) -> asyncio.Queue:
+        """Return the log queue, starting the writer task on the running loop if needed"""
+        if self._log_writer_task is None or self._log_writer_task.done():
+            self._log_queue = asyncio.Queue()
+            self._log_writer_task = asyncio.get_running_loop().create_task(self._log_writer(self._log_queue))
+        return self._log_queue
+    
+    async def _log_writer(self, queue: asyncio.Queue):
+        """
+        Drain the log queue: everything queued since the last write is grouped by
+        log file and appended with one write per file, off the event loop.
+        """
+        while True:
+            items = [await queue.get()]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            
+            chunks = {}
+            closes = []
+            close_waiters = []
+            for log_file, text in items:
+                if isinstance(text, str):
+                    chunks.setdefault(log_file, []).append(text)
+                else:
+                    # A close request carries the future its caller is waiting on
+                    closes.append(log_file)
+                    close_waiters.append(text)
+            try:
+                await asyncio.to_thread(self._write_log_chunks, chunks, closes)
+            except Exception as e:
+                logger.error(f"Error writing job log: {e}")
+            finally:
+                for waiter in close_waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                for _ in items:
+                    queue.task_done()
+    
+    def _write_log_chunks(self, chunks: dict, closes: list = ()):
+        """
+        Append the queued text for each log file as UTF-8 bytes on its cached O_APPEND
+        descriptor (no text/buffer layers, so it is visible to the live log view at once),
+        then close any requested descriptors.
+        """
+        try:
+            for log_file, texts in chunks.items():
+                # A failing log file only loses its own text, not the rest of the batch
+                try:
+                    self._write_log_file(log_file, texts)
+                except Exception as e:
+                    logger.error(f"Error writing job log {log_file}: {e}")
+                    # Drop the descriptor so the next write to this log reopens it
+                    self._close_fds([log_file])
+        finally:
+            self._close_fds(closes)
+    
+    def _write_log_file(self, log_file: Path, texts: list):
+        """Append texts to one log file, opening (and caching) its descriptor on first use"""
+        fd = self._log_fds.get(log_file)
+        if fd is None:
+            try:
+                fd = os.open(log_file, _LOG_OPEN_FLAGS, 0o644)
+            except FileNotFoundError:
+                # Only the first write to a new log directory pays for the mkdir
+                log_file.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(log_file, _LOG_OPEN_FLAGS, 0o644)
+            self._log_fds[log_file] = fd
+        parts = [text.encode("utf-8") for text in texts]
+        if _LOG_WRITEV is not None and len(parts) <= _LOG_IOV_MAX:
+            # One gather-write of the encoded pieces, no joined copy in between
+            written = _LOG_WRITEV(fd, parts)
+            if written == sum(map(len, parts)):
+                return
+            data = memoryview(b"".join(parts))[written:]
+        else:
+            data = memoryview(b"".join(parts))
+        while data:
+            data = data[os.write(fd, data):]
+    
+    def _close_fds(self, log_files):
+        """Close the cached descriptors for the given log files"""
+        for log_file in log_files:
+            fd = self._log_fds.pop(log_file, None)
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError as e:
+                    logger.error(f"Error closing job log {log_file}: {e}")
\ No newline at end of file
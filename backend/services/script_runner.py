@@ -0,0 +1,76 @@
+"""
+Script Runner - Runs pipeline scripts' main(argv) inside a worker process
+
+Kept free of Google/FastAPI imports so process-pool workers start quickly.
+"""
+
+import io
+import os
+import sys
+import contextlib
+import importlib.util
+import traceback
+from pathlib import Path
+
+# Script modules already imported in this process, keyed by script path
+_script_modules = {}
+
+
+def init_worker(cwd: str):
+    """
+    Process-pool initializer: run scripts from cwd (the project root), the same
+    working directory the subprocess fallback uses, so relative paths resolve alike.
+    """
+    os.chdir(cwd)
+
+
+def load_script_module(script_path: str):
+    """
+    Import a pipeline script as a module (once per process).
+    Returns None if it cannot be imported or has no main().
+    """
+    if script_path in _script_modules:
+        return _script_modules[script_path]
+
+    module = None
+    try:
+        # Script names contain '-', so load by file location under a sanitized module name
+        module_name = "_pipeline_" + Path(script_path).stem.replace("-", "_")
+        spec = importlib.util.spec_from_file_location(module_name, script_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, "main", None)):
+            module = None
+    except Exception:
+        module = None
+
+    _script_modules[script_path] = module
+    return module
+
+
+def run_script_main(script_path: str, argv: list):
+    """
+    Call a script's main(argv), capturing its output like a subprocess.
+    Output is returned when the script finishes (not streamed while it runs).
+    Returns (returncode, stdout, stderr); returncode is None if the script could not be imported.
+    """
+    module = load_script_module(script_path)
+    if module is None:
+        return None, "", f"Could not import {script_path}"
+
+    stdout_buf, stderr_buf = io.StringIO(), io.StringIO()
+    returncode = 0
+    with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stderr_buf):
+        try:
+            module.main(argv)
+        except SystemExit as e:
+            # sys.exit(None) / sys.exit(0) mean success; a message means failure
+            if isinstance(e.code, int):
+                returncode = e.code
+            elif e.code is not None:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+    return returncode, stdout_buf.getvalue(), stderr_buf.getvalue()
@@ -40,51 +40,173 @@ Examples:
 """
 
 import pandas as pd
+import numpy as np
 import argparse
 import sys
 import os
 from pathlib import Path
 import glob
+import fnmatch
 import re
 from typing import List, Tuple, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    # Optional multithreaded CSV parser (much faster on the large ADT / Change Capture exports),
+    # used only when asked for with --csv-engine pyarrow: it infers dates/booleans differently
+    # from the C parser, so the default output must not depend on whether it is installed
+    import pyarrow  # noqa: F401
+    _PYARROW_AVAILABLE = True
+except ImportError:
+    _PYARROW_AVAILABLE = False
 
-def load_csv_file(file_path, description):
-    """Load a CSV file and return the DataFrame."""
+_EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Background threads reading ADT/patient files ahead of processing in folder mode
+_READ_WORKERS = 4
+
+# Matches whose ADT/patient files are read ahead of the one being processed
+_PREFETCH_MATCHES = 8
+
+# CSVs at least this large are memory-mapped by the C parser
+_MEMORY_MAP_MIN_BYTES = 64 * 1024 * 1024
+
+# Visit (charge capture) columns actually used: patient names for visit counts,
+# Facility/POS/Patient ID for LTC metrics and CPT Codes for injection metrics
+_VISIT_COLUMNS = {'facility', 'pos', 'patient id', 'cpt codes'}
+
+
+# Columns the ADT and patient files must both have (the name merge keys)
+_REQUIRED_COLUMNS = ('first_name', 'last_name')
+
+
+# Known text columns, read as str so the parser skips type inference for them and the
+# merge keys get the same dtype in every file (an all-blank or numeric-looking name
+# column would otherwise be inferred as float/int and fail to merge with object keys)
+_COLUMN_DTYPES = {
+    'adt': {'first_name': str, 'last_name': str, 'to_type': str},
+    'patient': {'first_name': str, 'last_name': str, 'payer_type': str},
+    'visit': {'Facility': str, 'POS': str, 'CPT Codes': str, 'Patient ID': str},
+}
+
+
+def _is_visit_column(col):
+    """Return True for the charge capture columns the combiner reads (case-insensitive)."""
+    col_lower = str(col).lower()
+    if col_lower in _VISIT_COLUMNS:
+        return True
+    return 'name' in col_lower and ('first' in col_lower or 'last' in col_lower)
+
+
+def _read_data_file(file_path, usecols=None, dtype=None, csv_engine=None):
+    """
+    Read a CSV or Excel file into a DataFrame.
+    Excel files go straight to read_excel; anything else is parsed as CSV
+    (the C parser, or pyarrow when csv_engine="pyarrow", falling back to the C parser) and then as Excel.
+    usecols is an optional column-name predicate so unused columns are never parsed;
+    dtype maps known columns to types (columns missing from the file are ignored).
+    """
+    if str(file_path).lower().endswith(_EXCEL_EXTENSIONS):
+        return pd.read_excel(file_path, usecols=usecols, dtype=dtype)
+    
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"{description} file not found: {file_path}")
-        
-        # Check if path is a directory (common mistake)
-        if os.path.isdir(file_path):
-            raise ValueError(f"{description} path is a directory, not a file: {file_path}\n"
-                           f"  Hint: Did you mean to use --folders mode instead? Or specify a file path within the directory?")
-        
-        # Try to read as CSV first
-        try:
-            df = pd.read_csv(file_path)
-        except Exception:
-            # If CSV fails, try Excel
+        if csv_engine == "pyarrow":
             try:
-                df = pd.read_excel(file_path)
-            except Exception as e:
-                raise ValueError(f"Could not read {description} file as CSV or Excel: {e}")
+                # The pyarrow engine needs the projected columns as a list and only
+                # dtypes for columns that exist, so resolve both from the header
+                columns = None
+                if usecols is not None or dtype:
+                    header = pd.read_csv(file_path, nrows=0).columns
+                    if usecols is not None:
+                        columns = [col for col in header if usecols(col)]
+                    if dtype:
+                        dtype = {col: dtype[col] for col in header if col in dtype}
+                return pd.read_csv(file_path, engine="pyarrow", usecols=columns, dtype=dtype)
+            except Exception:
+                pass  # e.g. ragged rows the pyarrow parser rejects
+        # Large files are parsed straight from a read-only memory map (file-backed pages
+        # instead of read() copies); pandas' own memory_map avoids an extra BytesIO copy
+        memory_map = os.path.getsize(file_path) >= _MEMORY_MAP_MIN_BYTES
+        return pd.read_csv(file_path, usecols=usecols, dtype=dtype, memory_map=memory_map)
+    except Exception:
+        # If CSV fails, try Excel
+        return pd.read_excel(file_path, usecols=usecols, dtype=dtype)
+
+
+def _read_header(file_path):
+    """Read only the column names of a CSV or Excel file (same CSV-then-Excel order as _read_data_file)."""
+    if str(file_path).lower().endswith(_EXCEL_EXTENSIONS):
+        return list(pd.read_excel(file_path, nrows=0).columns)
+    try:
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    except Exception:
+        return list(pd.read_excel(file_path, nrows=0).columns)
+
+
+def _find_data_files(folder):
+    """All CSV and Excel files under folder (including subdirectories), sorted."""
+    # rglob searches recursively (includes the folder itself)
+    csv_files = list(folder.rglob("*.csv"))
+    excel_files = list(folder.rglob("*.xlsx")) + list(folder.rglob("*.xls"))
+    return sorted(set(csv_files + excel_files))
+
+
+class CSVCombinerError(Exception):
+    """
+    An input file could not be loaded or validated, or an output could not be written.
+    Raised instead of exiting so folder mode can skip the failing match and continue;
+    main() turns it into exit status 1 in individual file mode.
+    """
+
+
+def _read_input_file(file_path, description, usecols=None, dtype=None, csv_engine=None):
+    """
+    Check and read one input file, raising FileNotFoundError/ValueError on failure.
+    Prints nothing, so it can run in a background thread (see process_folder_batch).
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{description} file not found: {file_path}")
+    
+    # Check if path is a directory (common mistake)
+    if os.path.isdir(file_path):
+        raise ValueError(f"{description} path is a directory, not a file: {file_path}\n"
+                       f"  Hint: Did you mean to use --folders mode instead? Or specify a file path within the directory?")
+    
+    try:
+        return _read_data_file(file_path, usecols, dtype, csv_engine)
+    except Exception as e:
+        raise ValueError(f"Could not read {description} file as CSV or Excel: {e}")
+
+
+def load_csv_file(file_path, description, usecols=None, dtype=None, prefetched=None, csv_engine=None):
+    """
+    Load a CSV file (optionally only the columns matching usecols) and return the DataFrame.
+    prefetched is an optional Future of _read_input_file already submitted for this file.
+    """
+    try:
+        if prefetched is not None:
+            df = prefetched.result()
+        else:
+            df = _read_input_file(file_path, description, usecols, dtype, csv_engine)
         
         print(f"[OK] Loaded {description}: {df.shape[0]} rows, {df.shape[1]} columns")
         return df
     
     except Exception as e:
-        print(f"[FAILED] Error loading {description} file: {e}")
-        sys.exit(1)
+        raise CSVCombinerError(f"Error loading {description} file: {e}") from e
 
 
-def load_visit_files_from_folder(folder_path, description):
+def load_visit_files_from_folder(folder_path, description, usecols=None, dtype=None, csv_engine=None):
     """
     Load and combine all CSV/Excel files from a folder into a single DataFrame.
     
     Args:
         folder_path: Path to folder containing visit/change capture files, or path to a single file
         description: Description for logging purposes
+        usecols: Optional column-name predicate; other columns are skipped while parsing
+        dtype: Optional column -> type mapping passed to the reader
+        csv_engine: Optional CSV parser ("pyarrow" or "c"); default is the C parser
     
     Returns:
         Combined DataFrame with all files concatenated
@@ -93,7 +215,7 @@ def load_visit_files_from_folder(folder_path, description):
     
     # If it's a file, just load it normally
     if path.is_file():
-        return load_csv_file(str(path), description)
+        return load_csv_file(str(path), description, usecols, dtype, csv_engine=csv_engine)
     
     # If it's a folder, find all CSV/Excel files and combine them
     if not path.is_dir():
@@ -103,12 +225,7 @@ def load_visit_files_from_folder(folder_path, description):
     print(f"Searching in: {folder_path}")
     
     # Find all CSV and Excel files in the folder (including subdirectories)
-    # Use rglob to search recursively (includes current directory)
-    csv_files = list(path.rglob("*.csv"))
-    excel_files = list(path.rglob("*.xlsx")) + list(path.rglob("*.xls"))
-    
-    # Remove duplicates and sort
-    all_files = sorted(list(set(csv_files + excel_files)))
+    all_files = _find_data_files(path)
     
     if not all_files:
         raise FileNotFoundError(f"No CSV or Excel files found in {description} folder: {folder_path}")
@@ -121,26 +238,22 @@ def load_visit_files_from_folder(folder_path, description):
     dataframes = []
     total_rows = 0
     
-    for file_path in all_files:
-        try:
-            # Try CSV first
+    # Parse the files concurrently (the CSV parsers release the GIL); results are
+    # collected in file order so the combined row order and the log are unchanged
+    with ThreadPoolExecutor(max_workers=min(_READ_WORKERS, len(all_files))) as read_pool:
+        futures = [read_pool.submit(_read_data_file, file_path, usecols, dtype, csv_engine)
+                   for file_path in all_files]
+        
+        for file_path, future in zip(all_files, futures):
             try:
-                df = pd.read_csv(file_path)
-            except Exception:
-                # If CSV fails, try Excel
-                try:
-                    df = pd.read_excel(file_path)
-                except Exception as e:
-                    print(f"  [WARNING] Could not read {file_path.name}: {e}")
-                    continue
+                df = future.result()
+            except Exception as e:
+                print(f"  [WARNING] Could not read {file_path.name}: {e}")
+                continue
             
             dataframes.append(df)
             total_rows += len(df)
             print(f"  [OK] Loaded {file_path.name}: {len(df)} rows, {len(df.columns)} columns")
-            
-        except Exception as e:
-            print(f"  [FAILED] Error loading {file_path.name}: {e}")
-            continue
     
     if not dataframes:
         raise ValueError(f"Could not load any files from {description} folder: {folder_path}")
@@ -191,8 +304,17 @@ def load_visit_files_from_folder(folder_path, description):
         df = df[column_order]
         aligned_dfs.append(df)
     
-    # Concatenate all dataframes
-    combined_df = pd.concat(aligned_dfs, ignore_index=True)
+    # Concatenate all dataframes; when every frame has the same plain NumPy dtypes the columns
+    # are stacked directly, skipping concat's per-block alignment and consolidation
+    first_df = aligned_dfs[0]
+    if (len(aligned_dfs) > 1 and first_df.columns.is_unique
+            and all(isinstance(col_dtype, np.dtype) for col_dtype in first_df.dtypes)
+            and all(df.dtypes.equals(first_df.dtypes) for df in aligned_dfs[1:])):
+        combined_df = pd.DataFrame(
+            {col: np.concatenate([df[col].to_numpy() for df in aligned_dfs]) for col in column_order},
+            copy=False)
+    else:
+        combined_df = pd.concat(aligned_dfs, ignore_index=True)
     
     print(f"[OK] Combined {len(dataframes)} file(s) into single DataFrame")
     print(f"  Total rows: {len(combined_df)} (sum of parts: {total_rows})")
@@ -204,20 +326,24 @@ def load_visit_files_from_folder(folder_path, description):
 
 def validate_required_columns(df, required_cols, file_description):
     """Validate that the DataFrame has the required columns."""
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        print(f"[FAILED] {file_description} is missing required columns: {missing_cols}")
-        print(f"  Available columns: {list(df.columns)}")
-        sys.exit(1)
+    missing = frozenset(required_cols).difference(df.columns)
+    if missing:
+        # Report in the declared order so the message is stable
+        missing_cols = [col for col in required_cols if col in missing]
+        raise CSVCombinerError(f"{file_description} is missing required columns: {missing_cols}\n"
+                               f"  Available columns: {list(df.columns)}")
 
 
 def process_adt_data(adt_df):
     """Process ADT cycles data."""
     print("\n--- Processing ADT Data ---")
     
-    # Required columns for ADT data
-    required_cols = ['first_name', 'last_name']
-    validate_required_columns(adt_df, required_cols, "ADT file")
+    validate_required_columns(adt_df, _REQUIRED_COLUMNS, "ADT file")
+    
+    # to_type has only a handful of distinct values; categorical codes make the
+    # blank fill and discharge classification work per value instead of per row
+    if 'to_type' in adt_df.columns:
+        adt_df['to_type'] = adt_df['to_type'].astype('category')
     
     print(f"ADT data shape: {adt_df.shape}")
     print(f"ADT columns: {list(adt_df.columns)}")
@@ -229,9 +355,7 @@ def process_patient_data(patient_df):
     """Process patient data with payer type and length of stay."""
     print("\n--- Processing Patient Data ---")
     
-    # Required columns for patient data
-    required_cols = ['first_name', 'last_name']
-    validate_required_columns(patient_df, required_cols, "Patient file")
+    validate_required_columns(patient_df, _REQUIRED_COLUMNS, "Patient file")
     
     # Rename 'days' to 'LOS' if it exists
     if 'days' in patient_df.columns:
@@ -245,6 +369,10 @@ def process_patient_data(patient_df):
         after = patient_df['LOS'].isna().sum()
         if after > before:
             print(f"[WARN] {after - before} LOS value(s) could not be parsed as numeric and were set to NaN")
+
+    # Few distinct payer types; store as categorical codes
+    if 'payer_type' in patient_df.columns:
+        patient_df['payer_type'] = patient_df['payer_type'].astype('category')
     
     print(f"Patient data shape: {patient_df.shape}")
     print(f"Patient columns: {list(patient_df.columns)}")
@@ -252,8 +380,25 @@ def process_patient_data(patient_df):
     return patient_df
 
 
-def process_visit_data(visit_df):
-    """Process visit data to count visits per patient."""
+def _describe_visit_headers(visit_file_or_folder):
+    """One line per visit file with the columns in its header, for error messages."""
+    path = Path(visit_file_or_folder)
+    files = [path] if path.is_file() else _find_data_files(path)
+    lines = []
+    for file_path in files:
+        try:
+            lines.append(f"  {file_path.name} columns: {_read_header(file_path)}")
+        except Exception as e:
+            lines.append(f"  {file_path.name}: could not read header: {e}")
+    return "\n".join(lines)
+
+
+def process_visit_data(visit_df, visit_source=None):
+    """
+    Process visit data to count visits per patient.
+    visit_source is the visit file or folder the data was loaded from; when the name columns
+    are missing, its files' headers are reported (visit_df only holds the columns that were parsed).
+    """
     print("\n--- Processing Visit Data ---")
     
     # Check for different possible column names for patient names
@@ -261,17 +406,21 @@ def process_visit_data(visit_df):
     last_name_cols = [col for col in visit_df.columns if 'last' in col.lower() and 'name' in col.lower()]
     
     if not first_name_cols or not last_name_cols:
-        print(f"[FAILED] Visit file must contain columns with 'first name' and 'last name'")
-        print(f"  Available columns: {list(visit_df.columns)}")
-        sys.exit(1)
+        if visit_source is not None:
+            available = f"  Visit data: {visit_source}\n{_describe_visit_headers(visit_source)}"
+        else:
+            available = f"  Available columns: {list(visit_df.columns)}"
+        raise CSVCombinerError(f"Visit file must contain columns with 'first name' and 'last name'\n{available}")
     
     first_name_col = first_name_cols[0]
     last_name_col = last_name_cols[0]
     
     print(f"Using columns: '{first_name_col}' and '{last_name_col}' for patient names")
     
-    # Count visits per patient
-    visit_counts = visit_df.groupby([first_name_col, last_name_col]).size().reset_index(name='visit_count')
+    # Count visits per patient (one hash pass; the order of the counts doesn't matter)
+    visit_counts = visit_df.value_counts(
+        subset=[first_name_col, last_name_col], sort=False
+    ).rename('visit_count').reset_index()
     
     # Rename columns to match the expected format
     visit_counts = visit_counts.rename(columns={
@@ -286,21 +435,53 @@ def process_visit_data(visit_df):
     return visit_counts
 
 
+# Spaces and punctuation (hyphens, apostrophes, periods) are ignored when matching names
+_NAME_KEY_STRIP_RE = re.compile(r'[\W_]+')
+
+
+def _name_match_key(first_names, last_names):
+    """Build the patient matching key: lowercased first and last name without spaces/punctuation (blank if missing)."""
+    def normalize(names):
+        return names.fillna('').astype(str).str.lower().str.replace(_NAME_KEY_STRIP_RE, '', regex=True)
+    return normalize(first_names) + '\x1f' + normalize(last_names)
+
+
 def merge_dataframes(adt_df, patient_df, visit_counts):
     """Merge all dataframes together."""
     print("\n--- Merging Data ---")
     
-    # First merge: ADT data with patient data on first_name and last_name
+    # Both merges run on one normalized name key (lowercased first/last name without spaces or
+    # punctuation), so casing/spacing/punctuation differences between files no longer drop matches.
+    # Display names are applied once at the end.
+    name_keys = ['first_name', 'last_name']
+    
+    # First merge: ADT data with patient data on the name key (names kept from the patient file)
     print("Merging ADT data with patient data...")
-    merged_df = pd.merge(
-        patient_df, 
-        adt_df, 
-        on=['first_name', 'last_name'], 
-        how='inner', 
+    merged_df = patient_df.assign(
+        _name_key=_name_match_key(patient_df['first_name'], patient_df['last_name'])
+    ).merge(
+        adt_df.drop(columns=name_keys).assign(
+            _name_key=_name_match_key(adt_df['first_name'], adt_df['last_name'])
+        ),
+        on='_name_key',
+        how='inner',
         suffixes=('_patient', '_adt')
     )
     
-    print(f"[OK] Initial merge result: {merged_df.shape[0]} rows, {merged_df.shape[1]} columns")
+    print(f"[OK] Initial merge result: {merged_df.shape[0]} rows, {merged_df.shape[1] - 1} columns")
+    
+    # Second merge: Add visit counts
+    # Re-total the counts per name key (spelling variants of one patient collapse together)
+    # and look them up through the key index instead of merging
+    print("Adding visit counts...")
+    visits_by_key = visit_counts.groupby(
+        _name_match_key(visit_counts['First Name'], visit_counts['Last Name']), sort=False
+    )['visit_count'].sum()
+    merged_df['visit_count'] = merged_df['_name_key'].map(visits_by_key)
+    merged_df_with_visits = merged_df.drop(columns='_name_key')
+    
+    # Fill NaN values with 0 and convert to integer
+    merged_df_with_visits['visit_count'] = merged_df_with_visits['visit_count'].fillna(0).astype(int)
     
     # Rename columns to more readable names
     column_mapping = {
@@ -313,39 +494,27 @@ def merge_dataframes(adt_df, patient_df, visit_counts):
         'discharge_date': 'Discharge Date'
     }
     
-    # Apply column mapping (only for columns that exist)
-    existing_mapping = {k: v for k, v in column_mapping.items() if k in merged_df.columns}
-    merged_df = merged_df.rename(columns=existing_mapping)
-    
-    print(f"[OK] Renamed columns: {list(existing_mapping.keys())} -> {list(existing_mapping.values())}")
-    
-    # Second merge: Add visit counts
-    print("Adding visit counts...")
-    merged_df_with_visits = pd.merge(
-        merged_df, 
-        visit_counts, 
-        on=['First Name', 'Last Name'], 
-        how='left'
-    )
-    
-    # Fill NaN values with 0 and convert to integer
-    merged_df_with_visits['visit_count'] = merged_df_with_visits['visit_count'].fillna(0).astype(int)
-    
-    # Rename visit_count column
+    # Apply column mapping (only for columns that exist) together with the visit_count rename
+    existing_mapping = {k: v for k, v in column_mapping.items() if k in merged_df_with_visits.columns}
     merged_df_with_visits = merged_df_with_visits.rename(columns={
+        **existing_mapping,
         'visit_count': 'Number of Visits by Puzzle Provider'
     })
     
+    print(f"[OK] Renamed columns: {list(existing_mapping.keys())} -> {list(existing_mapping.values())}")
+    
     # Add Puzzle Patient column based on visit count
     merged_df_with_visits['Puzzle Patient'] = merged_df_with_visits['Number of Visits by Puzzle Provider'] > 0
     
     # Fill blank to_type values with 'Custodial'
     if 'to_type' in merged_df_with_visits.columns:
-        # Fill NaN and empty string values with 'Custodial'
-        merged_df_with_visits['to_type'] = merged_df_with_visits['to_type'].fillna('Custodial')
-        merged_df_with_visits['to_type'] = merged_df_with_visits['to_type'].apply(
-            lambda x: 'Custodial' if str(x).strip() == '' else x
-        )
+        # Fill NaN and empty string values with 'Custodial' (per category, not per row)
+        to_type = merged_df_with_visits['to_type'].astype('category')
+        blank_categories = [c for c in to_type.cat.categories if str(c).strip() == '']
+        to_type = to_type.cat.remove_categories(blank_categories)
+        if 'Custodial' not in to_type.cat.categories:
+            to_type = to_type.cat.add_categories('Custodial')
+        merged_df_with_visits['to_type'] = to_type.fillna('Custodial')
         print(f"[OK] Filled blank to_type values with 'Custodial'")
     
     print(f"[OK] Final merge result: {merged_df_with_visits.shape[0]} rows, {merged_df_with_visits.shape[1]} columns")
@@ -428,7 +597,7 @@ def calculate_ltc_metrics(visit_df, facility_name):
         first_name_cols = [c for c in ltc_rows.columns if 'first' in c.lower() and 'name' in c.lower()]
         last_name_cols = [c for c in ltc_rows.columns if 'last' in c.lower() and 'name' in c.lower()]
         if first_name_cols and last_name_cols:
-            unique_ltc_patients = ltc_rows.groupby([first_name_cols[0], last_name_cols[0]]).ngroups
+            unique_ltc_patients = ltc_rows.groupby([first_name_cols[0], last_name_cols[0]], sort=False).ngroups
         else:
             unique_ltc_patients = gross_ltc_encounters  # Can't deduplicate
 
@@ -502,6 +671,34 @@ def calculate_injection_metrics(visit_df, facility_name):
     return results
 
 
+def _classify_discharge_types(to_type_str):
+    """
+    Map lowercased, stripped to_type strings to discharge categories (vectorized).
+    Order matters: check specific types before generic ones (np.select takes the first match).
+    """
+    has_home = to_type_str.str.contains('home', regex=False)
+    not_funeral = ~to_type_str.str.contains('funeral', regex=False)
+    conditions = [
+        (to_type_str == '') | to_type_str.str.contains('custodial', regex=False),
+        to_type_str.str.contains('funeral|deceased'),
+        # Another Nursing Home / LTAC — check BEFORE 'hospital' so
+        # "Long term care hospital" maps here, not Hospital Transfer
+        to_type_str.str.contains('nursing home|swing bed|long term care|ltac|ltch'),
+        # Hospital Transfer (acute care, rehab, psychiatric)
+        to_type_str.str.contains('hospital', regex=False),
+        # Against Medical Advice → Other
+        to_type_str.str.contains('against medical advice', regex=False) | (to_type_str == 'ama'),
+        # Assisted Living (board and care, ALF, group home)
+        to_type_str.str.contains('board and care|assisted living|group home'),
+        # Home discharges
+        has_home & to_type_str.str.contains('no', regex=False) & not_funeral,
+        has_home & not_funeral,
+    ]
+    choices = ['Custodial', 'Expired', 'SNF', 'Hospital Transfer', 'Other',
+               'Assisted Living', 'Home Discharge No', 'Home Discharge']
+    return np.select(conditions, choices, default='Other')
+
+
 def _calculate_summary_metrics(df):
     """
     Calculate summary metrics from a patient DataFrame.
@@ -525,73 +722,52 @@ def _calculate_summary_metrics(df):
         def _is_medicare_a(payer):
             p = str(payer).lower()
             return 'medicare' in p or 'msho' in p
-        medicare_mask = df['Payer Type'].apply(_is_medicare_a)
-        managed_care_data = los_col[df['Payer Type'] == 'Managed Care']
+        # One grouped pass over the rows: LOS sums/counts per distinct payer value.
         # Cap MC LOS at 30 days for averaging — MC authorizations rarely exceed 30 days;
         # any days beyond that are typically under a different payer (Medicaid/self-pay).
-        managed_care_data_capped = managed_care_data.clip(upper=30)
-        medicare_data = los_col[medicare_mask]
-        los_managed_avg = managed_care_data_capped.mean() if len(managed_care_data_capped) > 0 else 0
-        los_medicare_avg = medicare_data.mean() if len(medicare_data) > 0 else 0
-        if pd.isna(los_managed_avg):
-            los_managed_avg = 0
-        if pd.isna(los_medicare_avg):
-            los_medicare_avg = 0
-        managed_care_count = len(df[df['Payer Type'] == 'Managed Care'])
-        medicare_a_count = int(medicare_mask.sum())
-
-    # Discharge mapping
-    # Order matters: check specific types before generic ones
-    discharge_mapping = []
+        payer_stats = pd.DataFrame({
+            'payer': df['Payer Type'],
+            'los': los_col,
+            'los_capped': los_col.clip(upper=30),
+        }).groupby('payer', sort=False, observed=True).agg(
+            los_sum=('los', 'sum'),
+            los_capped_sum=('los_capped', 'sum'),
+            los_count=('los', 'count'),
+            rows=('los', 'size'),
+        )
+        # The payer rules are then applied once per payer value instead of once per row
+        if 'Managed Care' in payer_stats.index:
+            managed_care = payer_stats.loc['Managed Care']
+            managed_care_count = int(managed_care['rows'])
+            if managed_care['los_count'] > 0:
+                los_managed_avg = managed_care['los_capped_sum'] / managed_care['los_count']
+        medicare = payer_stats[np.array([_is_medicare_a(payer) for payer in payer_stats.index], dtype=bool)]
+        medicare_a_count = int(medicare['rows'].sum())
+        medicare_los_count = medicare['los_count'].sum()
+        if medicare_los_count > 0:
+            los_medicare_avg = medicare['los_sum'].sum() / medicare_los_count
+
+    # Discharge mapping: classify each distinct to_type once, then total the rows per value
+    # (to_type is categorical after merge_dataframes; missing values count as Custodial)
     if 'to_type' in df.columns:
-        for to_type in df['to_type'].fillna('Custodial'):
-            to_type_str = str(to_type).strip().lower()
-            if to_type_str == '':
-                discharge_mapping.append('Custodial')
-            elif 'custodial' in to_type_str:
-                discharge_mapping.append('Custodial')
-            elif 'funeral' in to_type_str or 'deceased' in to_type_str:
-                discharge_mapping.append('Expired')
-            # Another Nursing Home / LTAC — check BEFORE 'hospital' so
-            # "Long term care hospital" maps here, not Hospital Transfer
-            elif ('nursing home' in to_type_str or
-                  'swing bed' in to_type_str or
-                  'long term care' in to_type_str or
-                  'ltac' in to_type_str or
-                  'ltch' in to_type_str):
-                discharge_mapping.append('SNF')
-            # Hospital Transfer (acute care, rehab, psychiatric)
-            elif 'hospital' in to_type_str:
-                discharge_mapping.append('Hospital Transfer')
-            # Against Medical Advice → Other
-            elif ('against medical advice' in to_type_str or
-                  to_type_str == 'ama'):
-                discharge_mapping.append('Other')
-            # Assisted Living (board and care, ALF, group home)
-            elif ('board and care' in to_type_str or
-                  'assisted living' in to_type_str or
-                  'group home' in to_type_str):
-                discharge_mapping.append('Assisted Living')
-            # Home discharges
-            elif 'home' in to_type_str and 'no' in to_type_str and 'funeral' not in to_type_str:
-                discharge_mapping.append('Home Discharge No')
-            elif 'home' in to_type_str and 'funeral' not in to_type_str:
-                discharge_mapping.append('Home Discharge')
-            elif 'other' in to_type_str or 'unknown' in to_type_str:
-                discharge_mapping.append('Other')
-            else:
-                discharge_mapping.append('Other')
+        to_type = df['to_type'].astype('category')
+        categories = pd.Series(to_type.cat.categories, dtype=object)
+        category_labels = _classify_discharge_types(categories.astype(str).str.strip().str.lower())
+        codes = to_type.cat.codes.to_numpy()
+        rows_per_category = np.bincount(codes[codes >= 0], minlength=len(categories))
+        discharge_counts = pd.Series(rows_per_category).groupby(category_labels).sum().to_dict()
+        discharge_counts['Custodial'] = discharge_counts.get('Custodial', 0) + int((codes < 0).sum())
     else:
-        discharge_mapping = ['Custodial'] * len(df)
+        discharge_counts = {'Custodial': len(df)}
 
-    total_home_discharge = discharge_mapping.count('Home Discharge')
-    total_home_discharge_no = discharge_mapping.count('Home Discharge No')
-    total_hospital_transfer = discharge_mapping.count('Hospital Transfer')
-    total_expired = discharge_mapping.count('Expired')
-    total_custodial = discharge_mapping.count('Custodial')
-    total_assisted_living = discharge_mapping.count('Assisted Living')
-    total_other = discharge_mapping.count('Other')
-    total_snf = discharge_mapping.count('SNF')
+    total_home_discharge = int(discharge_counts.get('Home Discharge', 0))
+    total_home_discharge_no = int(discharge_counts.get('Home Discharge No', 0))
+    total_hospital_transfer = int(discharge_counts.get('Hospital Transfer', 0))
+    total_expired = int(discharge_counts.get('Expired', 0))
+    total_custodial = int(discharge_counts.get('Custodial', 0))
+    total_assisted_living = int(discharge_counts.get('Assisted Living', 0))
+    total_other = int(discharge_counts.get('Other', 0))
+    total_snf = int(discharge_counts.get('SNF', 0))
 
     hd_ratio = f"{total_home_discharge}:{patients_served}" if patients_served > 0 else "0:0"
     hdn_ratio = f"{total_home_discharge_no}:{patients_served}" if patients_served > 0 else "0:0"
@@ -636,34 +812,58 @@ def _calculate_summary_metrics(df):
 
 def _build_summarized_columns(metrics, prefix=""):
     """
-    Build the column dict for summarized data from metrics.
+    Build the summary row's metric columns (column -> value) from metrics.
     If prefix is provided (e.g. 'NP_'), column names get that prefix.
     """
     p = prefix
     return {
-        f'{p}Patients Served': [metrics['patients_served']],
-        f'{p}LOS Overall Avg': [metrics['los_avg']],
-        f'{p}LOS Man Avg': [metrics['los_managed_avg']],
-        f'{p}LOS Med Avg': [metrics['los_medicare_avg']],
-        f'{p}Managed Care Count': [metrics['managed_care_count']],
-        f'{p}Medicare A Count': [metrics['medicare_a_count']],
-        f'{p}Managed Care Ratio': [f"{metrics['managed_care_count']}:{metrics['patients_served']}"],
-        f'{p}Medicare A Ratio': [f"{metrics['medicare_a_count']}:{metrics['patients_served']}"],
-        f'{p}HD': [metrics['hd_ratio']], f'{p}HDN': [metrics['hdn_ratio']],
-        f'{p}HT': [metrics['ht_ratio']], f'{p}Ex': [metrics['ex_ratio']],
-        f'{p}Cus': [metrics['cus_ratio']], f'{p}AL': [metrics['al_ratio']],
-        f'{p}OT': [metrics['ot_ratio']], f'{p}SNF': [metrics['snf_ratio']],
-        f'{p}%HD': [metrics['pct_home_discharge']],
-        f'{p}%HDN': [metrics['pct_home_discharge_no']],
-        f'{p}%HT': [metrics['pct_hospital_transfer']],
-        f'{p}%Ex': [metrics['pct_expired']],
-        f'{p}%Cus': [metrics['pct_custodial']],
-        f'{p}%AL': [metrics['pct_assisted_living']],
-        f'{p}%OT': [metrics['pct_other']],
-        f'{p}%SNF': [metrics['pct_snf']],
+        f'{p}Patients Served': metrics['patients_served'],
+        f'{p}LOS Overall Avg': metrics['los_avg'],
+        f'{p}LOS Man Avg': metrics['los_managed_avg'],
+        f'{p}LOS Med Avg': metrics['los_medicare_avg'],
+        f'{p}Managed Care Count': metrics['managed_care_count'],
+        f'{p}Medicare A Count': metrics['medicare_a_count'],
+        f'{p}Managed Care Ratio': f"{metrics['managed_care_count']}:{metrics['patients_served']}",
+        f'{p}Medicare A Ratio': f"{metrics['medicare_a_count']}:{metrics['patients_served']}",
+        f'{p}HD': metrics['hd_ratio'], f'{p}HDN': metrics['hdn_ratio'],
+        f'{p}HT': metrics['ht_ratio'], f'{p}Ex': metrics['ex_ratio'],
+        f'{p}Cus': metrics['cus_ratio'], f'{p}AL': metrics['al_ratio'],
+        f'{p}OT': metrics['ot_ratio'], f'{p}SNF': metrics['snf_ratio'],
+        f'{p}%HD': metrics['pct_home_discharge'],
+        f'{p}%HDN': metrics['pct_home_discharge_no'],
+        f'{p}%HT': metrics['pct_hospital_transfer'],
+        f'{p}%Ex': metrics['pct_expired'],
+        f'{p}%Cus': metrics['pct_custodial'],
+        f'{p}%AL': metrics['pct_assisted_living'],
+        f'{p}%OT': metrics['pct_other'],
+        f'{p}%SNF': metrics['pct_snf'],
     }
 
 
+def _build_summary_row(facility_name, metrics, ltc_gross_encounters, ltc_unique_patients, inj):
+    """
+    Build one facility's summary row (column -> value dict, in output column order):
+    Facility, visit columns, the standard metric columns, then LTC and injection columns.
+    """
+    summary_row = {'Facility': facility_name}
+    # Add Puzzle-specific visit columns
+    summary_row['Total Visits'] = metrics['total_visits']
+    summary_row['Avg Visits per Patient'] = metrics['avg_visits_per_patient']
+    # Add all standard columns
+    summary_row.update(_build_summarized_columns(metrics))
+    # Add LTC and injection columns
+    summary_row['Total Gross LTC Encounters'] = ltc_gross_encounters
+    summary_row['Patients Served (LTC)'] = ltc_unique_patients
+    summary_row['Inj_Total'] = inj.get('total', 0)
+    summary_row['Inj_Small_Joint'] = inj.get('20600', 0)
+    summary_row['Inj_Small_Joint_US'] = inj.get('20604', 0)
+    summary_row['Inj_Int_Joint'] = inj.get('20605', 0)
+    summary_row['Inj_Int_Joint_US'] = inj.get('20606', 0)
+    summary_row['Inj_Major_Joint'] = inj.get('20610', 0)
+    summary_row['Inj_Major_Joint_US'] = inj.get('20611', 0)
+    return summary_row
+
+
 def export_summarized_data(df, output_path, facility_name, ltc_gross_encounters=0, ltc_unique_patients=0, injection_metrics=None):
     """Export summarized data CSV with key metrics."""
     print(f"\n--- Exporting Summarized Data ---")
@@ -677,25 +877,10 @@ def export_summarized_data(df, output_path, facility_name, ltc_gross_encounters=
 
         metrics = _calculate_summary_metrics(df)
 
-        # Create summarized data using helper
-        summarized_data = {'Facility': [facility_name]}
-        # Add Puzzle-specific visit columns
-        summarized_data['Total Visits'] = [metrics['total_visits']]
-        summarized_data['Avg Visits per Patient'] = [metrics['avg_visits_per_patient']]
-        # Add all standard columns
-        summarized_data.update(_build_summarized_columns(metrics))
-        # Add LTC and injection columns
-        summarized_data['Total Gross LTC Encounters'] = [ltc_gross_encounters]
-        summarized_data['Patients Served (LTC)'] = [ltc_unique_patients]
-        summarized_data['Inj_Total'] = [inj.get('total', 0)]
-        summarized_data['Inj_Small_Joint'] = [inj.get('20600', 0)]
-        summarized_data['Inj_Small_Joint_US'] = [inj.get('20604', 0)]
-        summarized_data['Inj_Int_Joint'] = [inj.get('20605', 0)]
-        summarized_data['Inj_Int_Joint_US'] = [inj.get('20606', 0)]
-        summarized_data['Inj_Major_Joint'] = [inj.get('20610', 0)]
-        summarized_data['Inj_Major_Joint_US'] = [inj.get('20611', 0)]
-
-        summarized_df = pd.DataFrame(summarized_data)
+        # Create the summary row using helper
+        summary_row = _build_summary_row(facility_name, metrics, ltc_gross_encounters, ltc_unique_patients, inj)
+
+        summarized_df = pd.DataFrame([summary_row])
 
         # Save to CSV
         summarized_df.to_csv(output_path, index=False, encoding='utf-8')
@@ -738,8 +923,7 @@ def export_summarized_data(df, output_path, facility_name, ltc_gross_encounters=
         return summarized_df
 
     except Exception as e:
-        print(f"[FAILED] Error exporting summarized data: {e}")
-        sys.exit(1)
+        raise CSVCombinerError(f"Error exporting summarized data: {e}") from e
 
 
 def export_summarized_data_with_comparison(puzzle_df, non_puzzle_df, output_path, facility_name,
@@ -758,27 +942,13 @@ def export_summarized_data_with_comparison(puzzle_df, non_puzzle_df, output_path
         # Calculate Non-Puzzle metrics
         np_metrics = _calculate_summary_metrics(non_puzzle_df)
 
-        # Build the row: Facility + Puzzle columns + NP_ columns
-        summarized_data = {'Facility': [facility_name]}
-        # Puzzle visit columns (Non-Puzzle have 0 by definition)
-        summarized_data['Total Visits'] = [puzzle_metrics['total_visits']]
-        summarized_data['Avg Visits per Patient'] = [puzzle_metrics['avg_visits_per_patient']]
-        # Puzzle standard columns (no prefix)
-        summarized_data.update(_build_summarized_columns(puzzle_metrics))
-        # LTC and injection (Puzzle-specific)
-        summarized_data['Total Gross LTC Encounters'] = [ltc_gross_encounters]
-        summarized_data['Patients Served (LTC)'] = [ltc_unique_patients]
-        summarized_data['Inj_Total'] = [inj.get('total', 0)]
-        summarized_data['Inj_Small_Joint'] = [inj.get('20600', 0)]
-        summarized_data['Inj_Small_Joint_US'] = [inj.get('20604', 0)]
-        summarized_data['Inj_Int_Joint'] = [inj.get('20605', 0)]
-        summarized_data['Inj_Int_Joint_US'] = [inj.get('20606', 0)]
-        summarized_data['Inj_Major_Joint'] = [inj.get('20610', 0)]
-        summarized_data['Inj_Major_Joint_US'] = [inj.get('20611', 0)]
+        # Build the row: Facility + Puzzle columns (visit, LTC and injection columns are
+        # Puzzle-specific) + NP_ columns
+        summary_row = _build_summary_row(facility_name, puzzle_metrics, ltc_gross_encounters, ltc_unique_patients, inj)
         # Non-Puzzle columns (NP_ prefix)
-        summarized_data.update(_build_summarized_columns(np_metrics, prefix="NP_"))
+        summary_row.update(_build_summarized_columns(np_metrics, prefix="NP_"))
 
-        summarized_df = pd.DataFrame(summarized_data)
+        summarized_df = pd.DataFrame([summary_row])
         summarized_df.to_csv(output_path, index=False, encoding='utf-8')
 
         print(f"[OK] Comparison summarized data saved to: {output_path}")
@@ -788,8 +958,7 @@ def export_summarized_data_with_comparison(puzzle_df, non_puzzle_df, output_path
         return summarized_df
 
     except Exception as e:
-        print(f"[FAILED] Error exporting comparison summarized data: {e}")
-        sys.exit(1)
+        raise CSVCombinerError(f"Error exporting comparison summarized data: {e}") from e
 
 
 def _output_puzzle_patient_names(puzzle_df, output_dir, facility_name):
@@ -864,8 +1033,7 @@ def save_output(df, output_path):
         print(df.head().to_string(index=False))
         
     except Exception as e:
-        print(f"[FAILED] Error saving output: {e}")
-        sys.exit(1)
+        raise CSVCombinerError(f"Error saving output: {e}") from e
 
 
 def find_csv_files_in_folder(folder_path: str, file_patterns: List[str]) -> Dict[str, List[str]]:
@@ -885,25 +1053,40 @@ def find_csv_files_in_folder(folder_path: str, file_patterns: List[str]) -> Dict
     
     found_files = {}
     
+    # List the folder once, including subdirectories ('**' also covers the top level),
+    # then match names per pattern (fnmatch keeps glob's platform case rules)
+    all_paths = [(path, os.path.basename(path))
+                 for path in glob.glob(str(folder / "**" / "*"), recursive=True)]
+    
     for pattern in file_patterns:
         # Search for files matching the pattern
-        matching_files = []
-        for ext in ['*.csv', '*.xlsx', '*.xls']:
-            search_pattern = folder / f"*{pattern}*{ext}"
-            matching_files.extend(glob.glob(str(search_pattern), recursive=False))
+        name_patterns = [f"*{pattern}*{ext}" for ext in ['*.csv', '*.xlsx', '*.xls']]
+        matching_files = {path for path, name in all_paths
+                          if any(fnmatch.fnmatch(name, name_pattern) for name_pattern in name_patterns)}
         
-        # Also search in subdirectories
-        for ext in ['*.csv', '*.xlsx', '*.xls']:
-            search_pattern = folder / "**" / f"*{pattern}*{ext}"
-            matching_files.extend(glob.glob(str(search_pattern), recursive=True))
-        
-        # Remove duplicates and sort
-        matching_files = sorted(list(set(matching_files)))
-        found_files[pattern] = matching_files
+        # Sort (the set already removed duplicates)
+        found_files[pattern] = sorted(matching_files)
     
     return found_files
 
 
+# Facility-name normalization patterns, compiled once (applied in this order)
+_QUARTER_SUFFIX_RE = re.compile(r'\s*(q[1-4]|quarter\s*[1-4])\s*$', re.IGNORECASE)
+_TRAILING_NUMBER_RE = re.compile(r'\s+\d+\s*$')
+_FACILITY_SUFFIX_RES = [
+    re.compile(r'\s*health\s*care\s*llc\s*$', re.IGNORECASE),  # "health care llc" as a unit
+    re.compile(r'\s*health\s*care\s*$', re.IGNORECASE),        # "health care" alone
+    re.compile(r'\s*llc\s*$', re.IGNORECASE),                   # "llc" alone
+]
+_FACILITY_TYPE_SUFFIX_RE = re.compile(r'\s*(snf|ltc|facility|center|home)\s*$', re.IGNORECASE)  # other facility types
+_M_PLEASANT_RE = re.compile(r'\bm\.?\s*pleasant\b', re.IGNORECASE)
+_MT_PLEASANT_RE = re.compile(r'\bmt\.?\s*pleasant\b', re.IGNORECASE)
+_REHAB_RE = re.compile(r'\brehab\b', re.IGNORECASE)
+_AT_THE_RE = re.compile(r'\bat the\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DASH_UNDERSCORE_TO_SPACE = str.maketrans('-_', '  ')
+
+
 def extract_facility_name_from_filename(filename: str, file_type: str) -> str:
     """
     Extract facility name from filename for matching purposes.
@@ -920,36 +1103,24 @@ def extract_facility_name_from_filename(filename: str, file_type: str) -> str:
     if file_type == 'adt':
         # Handle ADT files like "ADT Medilodge at the Shore_cycles" or "ADT report Autumn Woods Residential Q3_cycles"
         # Remove ADT prefix (handle both space and underscore cases)
-        if name.startswith('adt '):
-            name = name[4:]  # Remove "adt "
-        elif name.startswith('adt-'):
-            name = name[4:]  # Remove "adt-"
-        elif name.startswith('adt_'):
-            name = name[4:]  # Remove "adt_"
+        if name.startswith(('adt ', 'adt-', 'adt_')):
+            name = name[4:]
         
         # Remove _cycles suffix
         name = name.replace('_cycles', '')
         
         # Remove "report" prefix if present (e.g., "report autumn woods residential q3" -> "autumn woods residential q3")
-        if name.startswith('report '):
-            name = name[7:]  # Remove "report "
-        elif name.startswith('report-'):
-            name = name[7:]  # Remove "report-"
-        elif name.startswith('report_'):
-            name = name[7:]  # Remove "report_"
+        if name.startswith(('report ', 'report-', 'report_')):
+            name = name[7:]
         
         # Remove "medilodge" prefix (only if present, for non-Medilodge facilities this won't match)
-        if name.startswith('medilodge '):
-            name = name[10:]  # Remove "medilodge "
-        elif name.startswith('medilodge-'):
-            name = name[10:]  # Remove "medilodge-"
-        elif name.startswith('medilodge_'):
-            name = name[10:]  # Remove "medilodge_"
+        if name.startswith(('medilodge ', 'medilodge-', 'medilodge_')):
+            name = name[10:]
         elif name.startswith('medilode-'):
-            name = name[9:]   # Remove "medilode-"
+            name = name[9:]
         
         # Normalize spaces, dashes, and underscores
-        name = name.replace('-', ' ').replace('_', ' ').strip()
+        name = name.translate(_DASH_UNDERSCORE_TO_SPACE).strip()
         
         # Remove "of" prefix if present (e.g., "of farmington" -> "farmington")
         if name.startswith('of '):
@@ -958,13 +1129,11 @@ def extract_facility_name_from_filename(filename: str, file_type: str) -> str:
     elif file_type == 'patient':
         # Handle patient files like "Medilodge_at_the_Shore" or "Medilodge_of_Sterling_Heights"
         # Remove "medilodge" prefix
-        if name.startswith('medilodge_'):
-            name = name[10:]  # Remove "medilodge_"
-        elif name.startswith('medilodge-'):
-            name = name[10:]  # Remove "medilodge-"
+        if name.startswith(('medilodge_', 'medilodge-')):
+            name = name[10:]
         
         # Convert underscores to spaces
-        name = name.replace('_', ' ').replace('-', ' ').strip()
+        name = name.translate(_DASH_UNDERSCORE_TO_SPACE).strip()
         
         # Remove "of" prefix if present (e.g., "of sterling heights" -> "sterling heights")
         if name.startswith('of '):
@@ -972,39 +1141,32 @@ def extract_facility_name_from_filename(filename: str, file_type: str) -> str:
     
     # Remove common suffixes that might appear in filenames (q3, q2, q1, q4, snf, etc.)
     # Remove quarter suffixes (q3, q2, q1, q4) - case insensitive, with optional spaces
-    name = re.sub(r'\s*(q[1-4]|quarter\s*[1-4])\s*$', '', name, flags=re.IGNORECASE)
+    name = _QUARTER_SUFFIX_RE.sub('', name)
 
     # Remove trailing standalone numbers from parenthetical suffixes like "(1)" -> "_1_" -> " 1 "
-    name = re.sub(r'\s+\d+\s*$', '', name).strip()
+    name = _TRAILING_NUMBER_RE.sub('', name).strip()
     
     # Remove facility type suffixes (snf, ltc, health care, llc, etc.) - case insensitive
     # Remove multiple suffixes iteratively to handle cases like "health care llc"
-    suffix_patterns = [
-        r'\s*health\s*care\s*llc\s*$',  # "health care llc" as a unit
-        r'\s*health\s*care\s*$',        # "health care" alone
-        r'\s*llc\s*$',                   # "llc" alone
-        r'\s*(snf|ltc|facility|center|home)\s*$'  # other facility types
-    ]
-    for pattern in suffix_patterns:
-        name = re.sub(pattern, '', name, flags=re.IGNORECASE).strip()
+    for pattern in _FACILITY_SUFFIX_RES:
+        name = pattern.sub('', name).strip()
+    name = _FACILITY_TYPE_SUFFIX_RE.sub('', name).strip()
     
     # Normalize Mt. Pleasant variations (m. pleasant, mt. pleasant, mt pleasant -> mt pleasant)
-    name = re.sub(r'\bm\.?\s*pleasant\b', 'mt pleasant', name, flags=re.IGNORECASE)
-    name = re.sub(r'\bmt\.?\s*pleasant\b', 'mt pleasant', name, flags=re.IGNORECASE)
+    name = _M_PLEASANT_RE.sub('mt pleasant', name)
+    name = _MT_PLEASANT_RE.sub('mt pleasant', name)
     
     # Normalize common facility name variations for matching
     name = name.replace('at the', 'at_the')
     name = name.replace('of the', 'of_the') 
     name = name.replace('sterling heights', 'sterling_heights')
-    name = name.replace('farmington', 'farmington')
-    name = name.replace('shore', 'shore')
     
     # Special handling for "at the shore" - ensure consistent normalization
     if 'at_the shore' in name:
         name = name.replace('at_the shore', 'at_the_shore')
     
     # Normalize multiple spaces to single space
-    name = re.sub(r'\s+', ' ', name)
+    name = _WHITESPACE_RE.sub(' ', name)
     
     # Final cleanup - remove any remaining spaces and normalize
     return name.strip()
@@ -1022,7 +1184,7 @@ def normalize_facility_name_for_matching(facility_name: str) -> str:
         Normalized facility name for matching
     """
     # Convert to lowercase and replace underscores/dashes with spaces
-    normalized = facility_name.lower().replace('_', ' ').replace('-', ' ').strip()
+    normalized = facility_name.lower().translate(_DASH_UNDERSCORE_TO_SPACE).strip()
 
     # Remove "of " prefix if present
     if normalized.startswith('of '):
@@ -1030,28 +1192,28 @@ def normalize_facility_name_for_matching(facility_name: str) -> str:
 
     # Remove common suffixes that might appear in filenames (q3, q2, q1, q4, snf, etc.)
     # Remove quarter suffixes (q3, q2, q1, q4) - case insensitive, with optional spaces
-    normalized = re.sub(r'\s*(q[1-4]|quarter\s*[1-4])\s*$', '', normalized, flags=re.IGNORECASE)
+    normalized = _QUARTER_SUFFIX_RE.sub('', normalized)
 
     # Remove facility type suffixes (snf, ltc, etc.) - case insensitive
-    normalized = re.sub(r'\s*(snf|ltc|facility|center|home)\s*$', '', normalized, flags=re.IGNORECASE)
+    normalized = _FACILITY_TYPE_SUFFIX_RE.sub('', normalized)
 
     # Remove trailing standalone numbers from parenthetical suffixes like "(1)"
-    normalized = re.sub(r'\s+\d+\s*$', '', normalized).strip()
+    normalized = _TRAILING_NUMBER_RE.sub('', normalized).strip()
 
     # Normalize "rehab" -> "rehabilitation" for consistent matching across files
     # e.g. "Maplewood Rehab Center" (ADT filename) == "Maplewood Rehabilitation Center" (LOS/GPT)
-    normalized = re.sub(r'\brehab\b', 'rehabilitation', normalized, flags=re.IGNORECASE)
+    normalized = _REHAB_RE.sub('rehabilitation', normalized)
 
     # Normalize "at the X" -> "at X" to handle naming variations like
     # "Villas at Cedars" (ADT PDF name) vs "Villas at the Cedars" (LOS PDF/GPT name)
-    normalized = re.sub(r'\bat the\b', 'at', normalized)
+    normalized = _AT_THE_RE.sub('at', normalized)
 
     # Normalize Mt. Pleasant variations (m. pleasant, mt. pleasant, mt pleasant -> mt pleasant)
-    normalized = re.sub(r'\bm\.?\s*pleasant\b', 'mt pleasant', normalized, flags=re.IGNORECASE)
-    normalized = re.sub(r'\bmt\.?\s*pleasant\b', 'mt pleasant', normalized, flags=re.IGNORECASE)
+    normalized = _M_PLEASANT_RE.sub('mt pleasant', normalized)
+    normalized = _MT_PLEASANT_RE.sub('mt pleasant', normalized)
 
     # Normalize multiple spaces to single space
-    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = _WHITESPACE_RE.sub(' ', normalized)
 
     # Remove leading/trailing whitespace
     normalized = normalized.strip()
@@ -1059,6 +1221,27 @@ def normalize_facility_name_for_matching(facility_name: str) -> str:
     return normalized
 
 
+# Display names for facility names that are matched exactly (after underscore replacement)
+_FACILITY_DISPLAY_NAMES = {
+    'at the shore': 'Medilodge at the Shore',
+    'sterling heights': 'Medilodge of Sterling Heights',
+    'farmington': 'Medilodge of Farmington',
+    'sault st marie': 'Medilodge of Sault St. Marie',
+    'clare': 'Medilodge of Clare',
+    'ludington': 'Medilodge of Ludington',
+    'mt pleasant': 'Medilodge of Mt. Pleasant',
+    'holland': 'Medilodge of Holland',
+    'wyoming': 'Medilodge of Wyoming',
+    'grand rapids': 'Medilodge of Grand Rapids',
+    'grand blanc': 'Medilodge of Grand Blanc',
+    'monroe': 'Medilodge of Monroe',
+    'howell': 'Medilodge of Howell',
+    'montrose': 'Medilodge of Montrose',
+    'shoreline': 'Medilodge of Shoreline',
+    'livingston': 'Medilodge of Livingston',
+}
+
+
 def format_facility_name_for_display(facility_name: str) -> str:
     """
     Format facility name for display with proper Medilodge prefix.
@@ -1074,40 +1257,12 @@ def format_facility_name_for_display(facility_name: str) -> str:
     display_name = facility_name.replace('_', ' ')
     
     # Handle specific facility name patterns (after underscore replacement)
-    if display_name == 'at the shore':
-        return 'Medilodge at the Shore'
-    elif display_name == 'sterling heights':
-        return 'Medilodge of Sterling Heights'
-    elif display_name == 'farmington':
-        return 'Medilodge of Farmington'
-    elif display_name == 'sault st marie':
-        return 'Medilodge of Sault St. Marie'
-    elif display_name == 'clare':
-        return 'Medilodge of Clare'
-    elif display_name == 'ludington':
-        return 'Medilodge of Ludington'
-    elif display_name == 'mt pleasant':
-        return 'Medilodge of Mt. Pleasant'
-    elif display_name == 'holland':
-        return 'Medilodge of Holland'
-    elif display_name == 'wyoming':
-        return 'Medilodge of Wyoming'
-    elif display_name == 'grand rapids':
-        return 'Medilodge of Grand Rapids'
-    elif display_name == 'grand blanc':
-        return 'Medilodge of Grand Blanc'
-    elif display_name == 'monroe':
-        return 'Medilodge of Monroe'
-    elif display_name == 'howell':
-        return 'Medilodge of Howell'
-    elif display_name == 'montrose':
-        return 'Medilodge of Montrose'
-    elif display_name == 'shoreline':
-        return 'Medilodge of Shoreline'
-    elif display_name == 'livingston':
-        return 'Medilodge of Livingston'
+    known_name = _FACILITY_DISPLAY_NAMES.get(display_name)
+    if known_name is not None:
+        return known_name
+    
     # --- Monarch / Villas / Estates facilities ---
-    elif 'brookview' in display_name:
+    if 'brookview' in display_name:
         return 'The Villas at Brookview'
     elif 'osseo' in display_name:
         return 'The Villas at Osseo'
@@ -1290,7 +1445,7 @@ def find_matching_files(adt_folder: str, patient_folder: str, visit_folder: str)
 
 
 def process_folder_batch(adt_folder: str, patient_folder: str, visit_folder: str, output_folder: str,
-                        facility_name: str = None, comparison_mode: bool = False) -> None:
+                        facility_name: str = None, comparison_mode: bool = False, csv_engine: str = None) -> None:
     """
     Process folders containing CSV files and combine matching files based on facility names.
     
@@ -1301,6 +1456,7 @@ def process_folder_batch(adt_folder: str, patient_folder: str, visit_folder: str
                       If folder contains multiple files, they will be combined into one.
         output_folder: Folder to save combined output files
         facility_name: Optional facility name for summary data
+        csv_engine: Optional CSV parser ("pyarrow" or "c"); default is the C parser
     """
     print("=" * 80)
     print("FOLDER BATCH PROCESSING - NAME MATCHING")
@@ -1317,38 +1473,66 @@ def process_folder_batch(adt_folder: str, patient_folder: str, visit_folder: str
     output_dir = Path(output_folder)
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # Every match uses the same visit data, so load and count it once for the whole batch;
+    # a load failure propagates so main exits non-zero
+    visit_data = load_and_process_visits(visit_folder, csv_engine)
+    
+    # Read the ADT and patient files of upcoming matches in background threads (the parsers release
+    # the GIL); matches are still processed one at a time, in order, so the log stays readable
+    # and the shared puzzle_patient_names.json is updated sequentially
+    read_pool = ThreadPoolExecutor(max_workers=_READ_WORKERS)
+    
+    def prefetch(match):
+        adt_file, patient_file, _ = match
+        return (read_pool.submit(_read_input_file, adt_file, "ADT cycles", None, _COLUMN_DTYPES['adt'], csv_engine),
+                read_pool.submit(_read_input_file, patient_file, "Patient data", None, _COLUMN_DTYPES['patient'],
+                                 csv_engine))
+    
+    # Only a window of matches is read ahead, so at most that many facilities' frames are held at once
+    prefetched_inputs = deque(prefetch(match) for match in matches[:_PREFETCH_MATCHES])
+    
     # Process each matching combination
     processed_count = 0
     
-    for adt_file, patient_file, visit_file_or_folder in matches:
-        try:
-            print(f"\n{'='*60}")
-            print(f"Processing match {processed_count + 1}:")
-            print(f"ADT: {Path(adt_file).name}")
-            print(f"Patient: {Path(patient_file).name}")
-            visit_path = Path(visit_file_or_folder)
-            visit_display = visit_path.name if visit_path.is_file() else f"{visit_file_or_folder} (folder)"
-            print(f"Visit: {visit_display}")
-            print(f"{'='*60}")
-            
-            # Generate output filename based on facility name
-            facility_name_from_file = extract_facility_name_from_filename(patient_file, 'patient')
-            facility_name_clean = format_facility_name_for_display(facility_name_from_file)
-            
-            output_filename = f"combined_{facility_name_clean.replace(' ', '_').replace('Medilodge_', '')}.csv"
-            output_path = output_dir / output_filename
-            
-            # Use facility name from file if not provided
-            current_facility_name = facility_name or facility_name_clean
-            
-            # Process this combination
-            process_file_combination(adt_file, patient_file, visit_file_or_folder, str(output_path), current_facility_name, comparison_mode=comparison_mode)
-            
-            processed_count += 1
+    try:
+        for index, (adt_file, patient_file, visit_file_or_folder) in enumerate(matches):
+            prefetched = prefetched_inputs.popleft()
+            if index + _PREFETCH_MATCHES < len(matches):
+                prefetched_inputs.append(prefetch(matches[index + _PREFETCH_MATCHES]))
             
-        except Exception as e:
-            print(f"[FAILED] Error processing match: {e}")
-            continue
+            try:
+                print(f"\n{'='*60}")
+                print(f"Processing match {processed_count + 1}:")
+                print(f"ADT: {Path(adt_file).name}")
+                print(f"Patient: {Path(patient_file).name}")
+                visit_path = Path(visit_file_or_folder)
+                visit_display = visit_path.name if visit_path.is_file() else f"{visit_file_or_folder} (folder)"
+                print(f"Visit: {visit_display}")
+                print(f"{'='*60}")
+                
+                # Generate output filename based on facility name
+                facility_name_from_file = extract_facility_name_from_filename(patient_file, 'patient')
+                facility_name_clean = format_facility_name_for_display(facility_name_from_file)
+                
+                output_filename = f"combined_{facility_name_clean.replace(' ', '_').replace('Medilodge_', '')}.csv"
+                output_path = output_dir / output_filename
+                
+                # Use facility name from file if not provided
+                current_facility_name = facility_name or facility_name_clean
+                
+                # Process this combination
+                process_file_combination(adt_file, patient_file, visit_file_or_folder, str(output_path), current_facility_name,
+                                         comparison_mode=comparison_mode, visit_data=visit_data,
+                                         prefetched=prefetched, csv_engine=csv_engine)
+                
+                processed_count += 1
+                
+            except Exception as e:
+                print(f"[FAILED] Error processing match: {e}")
+                continue
+    finally:
+        # Don't leave reads running if a failed load ends the batch early
+        read_pool.shutdown(cancel_futures=True)
     
     print(f"\n{'='*80}")
     print(f"[OK] BATCH PROCESSING COMPLETE!")
@@ -1357,8 +1541,27 @@ def process_folder_batch(adt_folder: str, patient_folder: str, visit_folder: str
     print(f"{'='*80}")
 
 
+def load_and_process_visits(visit_file_or_folder: str, csv_engine: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load the visit (charge capture) data and count visits per patient.
+
+    Args:
+        visit_file_or_folder: Path to visit data CSV file or folder containing multiple visit files
+        csv_engine: Optional CSV parser ("pyarrow" or "c"); default is the C parser
+
+    Returns:
+        Tuple of (visit_df, visit_counts)
+    """
+    visit_df = load_visit_files_from_folder(visit_file_or_folder, "Visit data", usecols=_is_visit_column,
+                                            dtype=_COLUMN_DTYPES['visit'], csv_engine=csv_engine)
+    visit_counts = process_visit_data(visit_df, visit_file_or_folder)
+    return visit_df, visit_counts
+
+
 def process_file_combination(adt_file: str, patient_file: str, visit_file_or_folder: str,
-                           output_file: str, facility_name: str = None, comparison_mode: bool = False) -> None:
+                           output_file: str, facility_name: str = None, comparison_mode: bool = False,
+                           visit_data: Tuple[pd.DataFrame, pd.DataFrame] = None, prefetched: Tuple = None,
+                           csv_engine: str = None) -> None:
     """
     Process a single combination of ADT, patient, and visit files.
 
@@ -1369,16 +1572,25 @@ def process_file_combination(adt_file: str, patient_file: str, visit_file_or_fol
         output_file: Path for the output CSV file
         facility_name: Optional facility name for summary data
         comparison_mode: If True, produce side-by-side Puzzle vs Non-Puzzle metrics
+        visit_data: Optional (visit_df, visit_counts) from load_and_process_visits, shared across
+                    a batch so the visit data is not reloaded for every facility
+        prefetched: Optional (adt_future, patient_future) of reads already started by process_folder_batch
+        csv_engine: Optional CSV parser ("pyarrow" or "c"); default is the C parser
     """
+    adt_future, patient_future = prefetched if prefetched is not None else (None, None)
+    
     # Load all input files
-    adt_df = load_csv_file(adt_file, "ADT cycles")
-    patient_df = load_csv_file(patient_file, "Patient data")
-    visit_df = load_visit_files_from_folder(visit_file_or_folder, "Visit data")
+    adt_df = load_csv_file(adt_file, "ADT cycles", dtype=_COLUMN_DTYPES['adt'], prefetched=adt_future,
+                           csv_engine=csv_engine)
+    patient_df = load_csv_file(patient_file, "Patient data", dtype=_COLUMN_DTYPES['patient'],
+                               prefetched=patient_future, csv_engine=csv_engine)
+    if visit_data is None:
+        visit_data = load_and_process_visits(visit_file_or_folder, csv_engine)
+    visit_df, visit_counts = visit_data
 
     # Process each dataset
     adt_df = process_adt_data(adt_df)
     patient_df = process_patient_data(patient_df)
-    visit_counts = process_visit_data(visit_df)
 
     # Merge all data
     final_df = merge_dataframes(adt_df, patient_df, visit_counts)
@@ -1445,7 +1657,11 @@ def process_file_combination(adt_file: str, patient_file: str, visit_file_or_fol
                                injection_metrics=inj_metrics)
 
 
-def main():
+# Separator line for main()'s run banners
+_BANNER = "=" * 60
+
+
+def main(argv=None):
     """Main function to orchestrate the CSV combining process."""
     parser = argparse.ArgumentParser(
         description="Combine CSV files (ADT cycles, patient data, and visit data) into combined output CSV files",
@@ -1463,66 +1679,93 @@ Examples:
         """
     )
     
-    # Add mutually exclusive group for individual files vs folders
-    group = parser.add_mutually_exclusive_group(required=True)
+    # Individual files vs folders is checked after parsing: argparse rejects a mutually
+    # exclusive group holding more than one positional as soon as the first one is given
     
     # Individual file processing
-    group.add_argument('adt_file', nargs='?', help='Path to ADT cycles CSV file (for individual file processing)')
-    group.add_argument('patient_file', nargs='?', help='Path to patient data CSV file (for individual file processing)')
-    group.add_argument('visit_file', nargs='?', help='Path to visit data CSV/Excel file or folder (for individual file processing). If folder, all files will be combined.')
-    group.add_argument('output_file', nargs='?', help='Path for the output CSV file (for individual file processing)')
+    parser.add_argument('adt_file', nargs='?', help='Path to ADT cycles CSV file (for individual file processing)')
+    parser.add_argument('patient_file', nargs='?', help='Path to patient data CSV file (for individual file processing)')
+    parser.add_argument('visit_file', nargs='?', help='Path to visit data CSV/Excel file or folder (for individual file processing). If folder, all files will be combined.')
+    parser.add_argument('output_file', nargs='?', help='Path for the output CSV file (for individual file processing)')
     
     # Folder processing
-    group.add_argument('--folders', nargs=4, metavar=('ADT_FOLDER', 'PATIENT_FOLDER', 'VISIT_FOLDER', 'OUTPUT_FOLDER'),
+    parser.add_argument('--folders', nargs=4, metavar=('ADT_FOLDER', 'PATIENT_FOLDER', 'VISIT_FOLDER', 'OUTPUT_FOLDER'),
                       help='Process folders of CSV files: ADT_FOLDER PATIENT_FOLDER VISIT_FOLDER OUTPUT_FOLDER. VISIT_FOLDER can contain multiple files that will be combined.')
     
     parser.add_argument('--facility-name', help='Name of the facility for summarized data (default: extracted from patient file name)')
     parser.add_argument('--comparison-mode', action='store_true', default=False,
                         help='Enable comparison mode: produce side-by-side Puzzle vs Non-Puzzle metrics')
+    parser.add_argument('--csv-engine', choices=['pyarrow', 'c'], default=None,
+                        help='CSV parser to use (default: the pandas C parser; pyarrow is faster on large files but '
+                             'may infer dates/booleans differently)')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    
+    if args.folders and args.adt_file is not None:
+        parser.error("Use either the individual file arguments or --folders, not both")
+    if not args.folders and args.adt_file is None:
+        parser.error("Either the individual file arguments or --folders is required")
+    
+    if args.csv_engine == "pyarrow" and not _PYARROW_AVAILABLE:
+        print("[WARNING] pyarrow is not installed; using the pandas C parser")
+        args.csv_engine = "c"
     
     # Check which mode to use
     if args.folders:
         # Folder processing mode
         adt_folder, patient_folder, visit_folder, output_folder = args.folders
         
-        print("=" * 60)
-        print("CSV COMBINER - FOLDER MODE")
-        print("=" * 60)
-        print(f"ADT folder: {adt_folder}")
-        print(f"Patient folder: {patient_folder}")
-        print(f"Visit folder: {visit_folder}")
-        print(f"Output folder: {output_folder}")
-        print("=" * 60)
+        print("\n".join([
+            _BANNER,
+            "CSV COMBINER - FOLDER MODE",
+            _BANNER,
+            f"ADT folder: {adt_folder}",
+            f"Patient folder: {patient_folder}",
+            f"Visit folder: {visit_folder}",
+            f"Output folder: {output_folder}",
+            _BANNER,
+        ]))
         
         # Process folders
-        process_folder_batch(adt_folder, patient_folder, visit_folder, output_folder, args.facility_name,
-                            comparison_mode=args.comparison_mode)
+        try:
+            process_folder_batch(adt_folder, patient_folder, visit_folder, output_folder, args.facility_name,
+                                comparison_mode=args.comparison_mode, csv_engine=args.csv_engine)
+        except CSVCombinerError as e:
+            print(f"[FAILED] {e}")
+            sys.exit(1)
         
     else:
         # Individual file processing mode
-        if not all([args.adt_file, args.patient_file, args.visit_file, args.output_file]):
-            parser.error("All four arguments (adt_file, patient_file, visit_file, output_file) are required for individual file processing")
+        file_args = (args.adt_file, args.patient_file, args.visit_file, args.output_file)
+        if None in file_args:
+            missing = [name for name, value in zip(('adt_file', 'patient_file', 'visit_file', 'output_file'), file_args)
+                       if value is None]
+            parser.error(f"All four arguments (adt_file, patient_file, visit_file, output_file) are required for individual file processing; missing: {', '.join(missing)}")
         
-        print("=" * 60)
-        print("CSV COMBINER - INDIVIDUAL FILE MODE")
-        print("=" * 60)
-        print(f"ADT file: {args.adt_file}")
-        print(f"Patient file: {args.patient_file}")
-        visit_path = Path(args.visit_file)
-        visit_display = f"{args.visit_file} ({'folder' if visit_path.is_dir() else 'file'})"
-        print(f"Visit data: {visit_display}")
-        print(f"Output file: {args.output_file}")
-        print("=" * 60)
+        adt_file, patient_file, visit_file, output_file = file_args
+        
+        visit_path = Path(visit_file)
+        visit_display = f"{visit_file} ({'folder' if visit_path.is_dir() else 'file'})"
+        print("\n".join([
+            _BANNER,
+            "CSV COMBINER - INDIVIDUAL FILE MODE",
+            _BANNER,
+            f"ADT file: {adt_file}",
+            f"Patient file: {patient_file}",
+            f"Visit data: {visit_display}",
+            f"Output file: {output_file}",
+            _BANNER,
+        ]))
         
         # Process individual files
-        process_file_combination(args.adt_file, args.patient_file, args.visit_file, args.output_file, args.facility_name,
-                                comparison_mode=args.comparison_mode)
+        try:
+            process_file_combination(adt_file, patient_file, visit_file, output_file, args.facility_name,
+                                    comparison_mode=args.comparison_mode, csv_engine=args.csv_engine)
+        except CSVCombinerError as e:
+            print(f"[FAILED] {e}")
+            sys.exit(1)
     
-    print("\n" + "=" * 60)
-    print("[OK] PROCESSING COMPLETE!")
-    print("=" * 60)
+    print(f"\n{_BANNER}\n[OK] PROCESSING COMPLETE!\n{_BANNER}")
 
 
 if __name__ == "__main__":
@@ -60,11 +60,7 @@ def find_summarized_files(input_folder: str) -> List[str]:
     found_files = []
     
     for pattern in patterns:
-        # Search in main directory
-        search_pattern = folder / pattern
-        found_files.extend(glob.glob(str(search_pattern), recursive=False))
-        
-        # Search in subdirectories
+        # Search main directory and subdirectories ("**" also matches zero directories)
         search_pattern = folder / "**" / pattern
         found_files.extend(glob.glob(str(search_pattern), recursive=True))
     
@@ -101,11 +97,7 @@ def find_combined_files(input_folder: str) -> List[str]:
     found_files = []
     
     for pattern in patterns:
-        # Search in main directory
-        search_pattern = folder / pattern
-        found_files.extend(glob.glob(str(search_pattern), recursive=False))
-        
-        # Search in subdirectories
+        # Search main directory and subdirectories ("**" also matches zero directories)
         search_pattern = folder / "**" / pattern
         found_files.extend(glob.glob(str(search_pattern), recursive=True))
     
@@ -521,7 +513,7 @@ def save_all_patients(df: pd.DataFrame, output_file: str) -> None:
         sys.exit(1)
 
 
-def main():
+def main(argv=None):
     """Main function to orchestrate the summary combining process."""
     parser = argparse.ArgumentParser(
         description="Combine summarized CSV files into master summary and/or combine all patient data from combined files",
@@ -551,7 +543,7 @@ Examples:
     parser.add_argument('--add-metrics', action='store_true', help='Add additional calculated metrics')
     parser.add_argument('--all-patients', help='Path for the output all patients CSV file (combines all combined_*.csv files)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Determine input folder and output file
     input_folder = args.input_folder or args.input_folder
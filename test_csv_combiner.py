@@ -0,0 +1,180 @@
+"""
+Focused tests for csv_combiner-test.py that run on small in-memory / temporary data:
+patient name matching across the ADT, patient and visit files, and main()'s
+individual-file vs --folders argument handling.
+
+Run with pytest, or directly: python test_csv_combiner.py
+"""
+import sys
+import os
+import io
+import tempfile
+import contextlib
+import importlib.util
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# The script name contains '-', so load it by file location
+_spec = importlib.util.spec_from_file_location(
+    "csv_combiner_under_test", os.path.join(PROJECT_ROOT, "csv_combiner-test.py")
+)
+combiner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(combiner)
+
+
+def _quiet(func, *args, **kwargs):
+    """Call func with its progress prints swallowed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def test_name_match_key_ignores_case_spacing_and_punctuation():
+    keys = combiner._name_match_key(
+        pd.Series([" JOHN ", "Mary-Ann", "mary ann", None]),
+        pd.Series(["o'brien", "St. James", "ST JAMES", "Smith"]),
+    )
+    johns = combiner._name_match_key(pd.Series(["John"]), pd.Series(["OBrien"]))
+    assert keys[0] == johns[0]
+    assert keys[1] == keys[2]
+    assert keys[3] == "\x1fsmith"
+
+
+def test_name_match_key_keeps_first_and_last_name_apart():
+    keys = combiner._name_match_key(pd.Series(["Ann", "Annl"]), pd.Series(["lee", "ee"]))
+    assert keys[0] != keys[1]
+
+
+def test_merge_matches_names_differing_in_case_and_punctuation():
+    adt_df = pd.DataFrame({
+        "first_name": ["JOHN ", "mary-ann", "Zed"],
+        "last_name": ["o'brien", "St. James", "Nobody"],
+        "to_type": ["Home", "Hospital", "Home"],
+    })
+    patient_df = pd.DataFrame({
+        "first_name": ["John", "Mary Ann"],
+        "last_name": [" OBrien", "ST JAMES"],
+        "payer_type": ["Medicare A", "Managed Care"],
+        "LOS": [10, 20],
+    })
+    visit_counts = pd.DataFrame({
+        "First Name": ["john", "John"],
+        "Last Name": ["O'BRIEN", "Obrien"],
+        "visit_count": [2, 1],
+    })
+
+    merged = _quiet(combiner.merge_dataframes, adt_df, patient_df, visit_counts).set_index("First Name")
+
+    # Zed is only in the ADT file; names come from the patient file
+    assert sorted(merged.index) == ["John", "Mary Ann"]
+    # Both spellings of John's name in the visit file count towards him
+    assert merged.loc["John", "Number of Visits by Puzzle Provider"] == 3
+    assert bool(merged.loc["John", "Puzzle Patient"])
+    assert merged.loc["Mary Ann", "Number of Visits by Puzzle Provider"] == 0
+    assert not bool(merged.loc["Mary Ann", "Puzzle Patient"])
+    assert "_name_key" not in merged.columns
+
+
+def test_missing_visit_name_columns_reports_file_header():
+    with tempfile.TemporaryDirectory() as tmp:
+        visit_file = os.path.join(tmp, "visits.csv")
+        pd.DataFrame({"Patient": ["Ann Lee"], "Facility": ["Test Facility"], "Notes": ["x"]}).to_csv(
+            visit_file, index=False)
+        try:
+            _quiet(combiner.load_and_process_visits, visit_file)
+        except combiner.CSVCombinerError as e:
+            # The full header, not just the visit columns that were parsed
+            assert "visits.csv columns: ['Patient', 'Facility', 'Notes']" in str(e)
+        else:
+            raise AssertionError("visit data without name columns was accepted")
+
+
+def _main_error(argv):
+    """Run main(argv) expecting a usage error; returns the exit code and stderr"""
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        try:
+            _quiet(combiner.main, argv)
+        except SystemExit as e:
+            return e.code, stderr.getvalue()
+    raise AssertionError(f"main({argv}) did not exit")
+
+
+def test_main_rejects_folders_with_positional_files():
+    code, stderr = _main_error(["--folders", "adt", "patient", "visit", "out", "extra.csv"])
+    assert code == 2
+    assert "not both" in stderr
+
+
+def test_main_requires_a_mode():
+    code, stderr = _main_error([])
+    assert code == 2
+    assert "--folders is required" in stderr
+
+
+def test_main_names_missing_individual_arguments():
+    code, stderr = _main_error(["adt.csv", "patient.csv"])
+    assert code == 2
+    assert "missing: visit_file, output_file" in stderr
+
+
+def test_main_runs_individual_file_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        adt_file = os.path.join(tmp, "adt.csv")
+        patient_file = os.path.join(tmp, "patient.csv")
+        visit_file = os.path.join(tmp, "visits.csv")
+        output_file = os.path.join(tmp, "out", "combined.csv")
+        pd.DataFrame({"first_name": ["Ann", "Bob"], "last_name": ["Lee", "Kim"],
+                      "to_type": ["Home", "Hospital"]}).to_csv(adt_file, index=False)
+        pd.DataFrame({"first_name": ["Ann", "Bob"], "last_name": ["Lee", "Kim"],
+                      "payer_type": ["Medicare A", "Managed Care"], "days": [5, 7]}).to_csv(patient_file, index=False)
+        pd.DataFrame({"First Name": ["ann"], "Last Name": ["LEE"], "Facility": ["Test Facility"],
+                      "POS": [32], "CPT Codes": ["99309"], "Patient ID": ["P1"]}).to_csv(visit_file, index=False)
+
+        _quiet(combiner.main, [adt_file, patient_file, visit_file, output_file, "--facility-name", "Test Facility"])
+
+        # Only Puzzle Patients (at least one visit) are written out
+        combined = pd.read_csv(output_file)
+        assert combined["First Name"].tolist() == ["Ann"]
+        assert combined["Number of Visits by Puzzle Provider"].tolist() == [1]
+        assert os.path.exists(os.path.join(tmp, "out", "summarized_combined.csv"))
+
+
+def test_main_folder_mode_exits_non_zero_when_visit_data_fails_to_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        folders = [os.path.join(tmp, name) for name in ("adt", "patient", "visit", "out")]
+        for folder in folders[:3]:
+            os.mkdir(folder)
+        adt_folder, patient_folder, visit_folder, output_folder = folders
+        pd.DataFrame({"first_name": ["Ann"], "last_name": ["Lee"], "to_type": ["Home"]}).to_csv(
+            os.path.join(adt_folder, "ADT Test Facility_cycles.csv"), index=False)
+        pd.DataFrame({"first_name": ["Ann"], "last_name": ["Lee"], "payer_type": ["Medicare A"],
+                      "days": [5]}).to_csv(os.path.join(patient_folder, "Test Facility.csv"), index=False)
+        # No 'first name' / 'last name' columns
+        pd.DataFrame({"Patient": ["Ann Lee"], "Facility": ["Test Facility"]}).to_csv(
+            os.path.join(visit_folder, "visits.csv"), index=False)
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            try:
+                combiner.main(["--folders", *folders])
+            except SystemExit as e:
+                code = e.code
+            else:
+                code = 0
+        assert code not in (0, None)
+        assert "PROCESSING COMPLETE" not in stdout.getvalue()
+
+
+if __name__ == "__main__":
+    tests = [(name, func) for name, func in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"[OK] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[FAILED] {name}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,126 @@
+"""
+Focused tests for PipelineService helpers that do not need Google access or job data:
+output filename normalization (collision suffixes) and the concurrent report steps.
+
+Run with pytest, or directly: python test_pipeline_service.py
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.services.pipeline import PipelineService
+
+
+def _touch(directory, *names):
+    for name in names:
+        (Path(directory) / name).write_text(name)
+
+
+def test_plan_renames_suffixes_inputs_mapping_to_same_target():
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(tmp, "Foo Bar.csv", "foo-bar.csv")
+        renames = PipelineService._plan_filename_renames(tmp)
+        assert renames == [("Foo Bar.csv", "foo_bar.csv"), ("foo-bar.csv", "foo_bar_1.csv")]
+
+
+def test_plan_renames_keeps_existing_normalized_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(tmp, "foo_bar.csv", "Foo Bar.CSV", "foo_bar_1.csv")
+        renames = PipelineService._plan_filename_renames(tmp)
+        # foo_bar.csv and foo_bar_1.csv are taken, so the new name moves on to _2
+        assert renames == [("Foo Bar.CSV", "foo_bar_2.csv")]
+
+
+def test_plan_renames_skips_normalized_names_and_directories():
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(tmp, "already_fine.csv")
+        os.mkdir(Path(tmp) / "Sub Dir")
+        assert PipelineService._plan_filename_renames(tmp) == []
+
+
+def test_normalize_filenames_loses_no_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        _touch(tmp, "Foo Bar.csv", "foo-bar.csv", "FOO.BAR.csv", "foo_bar.csv")
+        log_file = Path(tmp) / "logs" / "job.log"
+        service = PipelineService()
+
+        async def run():
+            await service._normalize_filenames(Path(tmp), log_file)
+            await service.aclose()
+
+        asyncio.run(run())
+        names = sorted(entry.name for entry in os.scandir(tmp) if entry.is_file())
+        assert names == ["foo.bar.csv", "foo_bar.csv", "foo_bar_1.csv", "foo_bar_2.csv"]
+        # Each file still holds its own original content
+        contents = sorted((Path(tmp) / name).read_text() for name in names)
+        assert contents == sorted(["Foo Bar.csv", "foo-bar.csv", "FOO.BAR.csv", "foo_bar.csv"])
+        assert log_file.read_text().count("Renamed: ") == 3
+
+
+def test_aclose_shuts_down_worker_pool():
+    service = PipelineService()
+    pool = service._get_process_pool()
+    asyncio.run(service.aclose())
+    assert service._process_pool is None
+    try:
+        pool.submit(print)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("worker pool still accepts work after aclose")
+
+
+def test_concurrent_steps_reraise_first_failure_after_all_finish():
+    finished = []
+
+    async def step(name, delay, error=None):
+        await asyncio.sleep(delay)
+        finished.append(name)
+        if error:
+            raise error
+
+    async def run():
+        await PipelineService._run_steps_concurrently([
+            step("test_fac_pdf", 0.02, ValueError("Test Fac failed")),
+            step("facility_pdf", 0.01, RuntimeError("Facility PDF failed")),
+            step("slides", 0.05),
+        ])
+
+    try:
+        asyncio.run(run())
+    except ValueError as e:
+        # The first step's error wins, even though another step failed earlier in time
+        assert str(e) == "Test Fac failed"
+    else:
+        raise AssertionError("step failure was not re-raised")
+    # The slower steps were not cancelled by the failures
+    assert sorted(finished) == ["facility_pdf", "slides", "test_fac_pdf"]
+
+
+def test_concurrent_steps_succeed_without_failures():
+    finished = []
+
+    async def step(name):
+        await asyncio.sleep(0)
+        finished.append(name)
+
+    asyncio.run(PipelineService._run_steps_concurrently([step("a"), step("b")]))
+    assert sorted(finished) == ["a", "b"]
+
+
+if __name__ == "__main__":
+    tests = [(name, func) for name, func in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"[OK] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[FAILED] {name}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)